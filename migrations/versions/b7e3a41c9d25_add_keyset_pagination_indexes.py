@@ -0,0 +1,43 @@
+"""add keyset pagination indexes
+
+Revision ID: b7e3a41c9d25
+Revises: 30f9b89dc527
+Create Date: 2026-10-18 10:12:31.204518
+
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "b7e3a41c9d25"
+down_revision = "30f9b89dc527"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_system_baselines_org_id_display_name_id",
+        "system_baselines",
+        ["org_id", "display_name", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_system_baselines_org_id_created_on_id",
+        "system_baselines",
+        ["org_id", "created_on", "id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_system_baselines_org_id_modified_on_id",
+        "system_baselines",
+        ["org_id", "modified_on", "id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_system_baselines_org_id_modified_on_id", table_name="system_baselines")
+    op.drop_index("ix_system_baselines_org_id_created_on_id", table_name="system_baselines")
+    op.drop_index("ix_system_baselines_org_id_display_name_id", table_name="system_baselines")
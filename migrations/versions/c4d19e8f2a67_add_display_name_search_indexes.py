@@ -0,0 +1,45 @@
+"""add display name search indexes
+
+Revision ID: c4d19e8f2a67
+Revises: b7e3a41c9d25
+Create Date: 2026-10-18 11:02:47.583106
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "c4d19e8f2a67"
+down_revision = "b7e3a41c9d25"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # pg_trgm for the trigram operator class, btree_gin for org_id in a GIN index
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gin")
+
+    # substring search, lower(display_name) LIKE '%...%'
+    op.create_index(
+        "ix_system_baselines_org_id_display_name_trgm",
+        "system_baselines",
+        ["org_id", sa.text("lower(display_name) gin_trgm_ops")],
+        unique=False,
+        postgresql_using="gin",
+    )
+    # prefix search, lower(display_name) LIKE '...%'
+    op.create_index(
+        "ix_system_baselines_org_id_display_name_prefix",
+        "system_baselines",
+        ["org_id", sa.text("lower(display_name) text_pattern_ops")],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index("ix_system_baselines_org_id_display_name_prefix", table_name="system_baselines")
+    op.drop_index("ix_system_baselines_org_id_display_name_trgm", table_name="system_baselines")
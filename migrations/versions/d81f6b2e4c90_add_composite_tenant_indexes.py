@@ -0,0 +1,68 @@
+"""add composite tenant indexes
+
+Revision ID: d81f6b2e4c90
+Revises: c4d19e8f2a67
+Create Date: 2026-10-18 11:41:09.337260
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = "d81f6b2e4c90"
+down_revision = "c4d19e8f2a67"
+branch_labels = None
+depends_on = None
+
+
+DUPLICATE_DISPLAY_NAMES = sa.text(
+    "select org_id, display_name, count(*) from system_baselines"
+    " where org_id is not null group by org_id, display_name having count(*) > 1"
+    " order by org_id, display_name"
+)
+
+
+def upgrade():
+    # only (account, display_name) was unique before, so baselines of an org_id that
+    # spans several accounts can share a display name. They have to be renamed by hand.
+    duplicates = op.get_bind().execute(DUPLICATE_DISPLAY_NAMES).fetchall()
+    if duplicates:
+        raise RuntimeError(
+            "cannot add the _org_id_display_name_uc constraint, rename the baselines"
+            " with duplicate display names within an org_id first: %s"
+            % "; ".join(
+                "org_id %s has %s baselines named %r" % (org_id, count, display_name)
+                for org_id, display_name, count in duplicates
+            )
+        )
+
+    op.create_unique_constraint(
+        "_org_id_display_name_uc", "system_baselines", ["org_id", "display_name"]
+    )
+    op.create_index(
+        "ix_system_baseline_mapped_systems_org_id_system_id",
+        "system_baseline_mapped_systems",
+        ["org_id", "system_id"],
+        unique=False,
+    )
+    op.create_index(
+        "ix_system_baseline_mapped_systems_org_id_system_baseline_id",
+        "system_baseline_mapped_systems",
+        ["org_id", "system_baseline_id"],
+        unique=False,
+    )
+
+
+def downgrade():
+    op.drop_index(
+        "ix_system_baseline_mapped_systems_org_id_system_baseline_id",
+        table_name="system_baseline_mapped_systems",
+    )
+    op.drop_index(
+        "ix_system_baseline_mapped_systems_org_id_system_id",
+        table_name="system_baseline_mapped_systems",
+    )
+    op.drop_constraint("_org_id_display_name_uc", "system_baselines", type_="unique")
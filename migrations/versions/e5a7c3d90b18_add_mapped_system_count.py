@@ -0,0 +1,45 @@
+"""add mapped_system_count to baselines
+
+Revision ID: e5a7c3d90b18
+Revises: d81f6b2e4c90
+Create Date: 2026-10-18 13:26:55.918402
+
+"""
+
+import sqlalchemy as sa
+
+from alembic import op
+
+from system_baseline import mapped_system_count
+
+
+# revision identifiers, used by Alembic.
+revision = "e5a7c3d90b18"
+down_revision = "d81f6b2e4c90"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "system_baselines",
+        sa.Column("mapped_system_count", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.execute(
+        """
+UPDATE system_baselines
+SET mapped_system_count = counts.count
+FROM (
+    SELECT system_baseline_id, count(*) AS count
+    FROM system_baseline_mapped_systems
+    GROUP BY system_baseline_id
+) AS counts
+WHERE system_baselines.id = counts.system_baseline_id
+"""
+    )
+    op.execute(mapped_system_count.CREATE_TRIGGERS)
+
+
+def downgrade():
+    op.execute(mapped_system_count.DROP_TRIGGERS)
+    op.drop_column("system_baselines", "mapped_system_count")
@@ -9,11 +9,16 @@ from kerlescan.error import handle_http_error
 from kerlescan.exceptions import HTTPError
 from kerlescan.metrics_registry import create_prometheus_registry_dir
 
-from system_baseline import app_config, db_config
+from system_baseline import app_config, db_config, replica, response_validation
+from system_baseline.async_app import create_async_dispatcher
 from system_baseline.global_helpers import global_helpers_bp
 from system_baseline.hsts_response import register_hsts_response
 from system_baseline.internal_views.v1 import section as internal_v1_bp
 from system_baseline.models import db
+from system_baseline.reconciler import (
+    reconcile_dirty_baselines_command,
+    reconcile_mapped_system_counts_command,
+)
 from system_baseline.views.v1 import section as v1_bp
 
 
@@ -26,11 +31,27 @@ def create_app():
     return create_connexion_app()
 
 
-def create_connexion_app():
-    openapi_args = {
+def create_asgi_app():
+    """
+    Creates the app served by uvicorn: the Connexion app, behind the dispatcher to the
+    async API when it is enabled.
+    :return:    app
+    """
+    connexion_app = create_app()
+    if not app_config.async_api_enabled:
+        return connexion_app
+    return create_async_dispatcher(connexion_app, get_openapi_args())
+
+
+def get_openapi_args():
+    return {
         "path_prefix": config.path_prefix.strip("/"),
         "app_name": app_config.get_app_name().strip("/"),
     }
+
+
+def create_connexion_app():
+    openapi_args = get_openapi_args()
     connexion_app = FlaskApp(__name__, specification_dir="openapi/")
 
     flask_app = connexion_app.app
@@ -40,14 +61,16 @@ def create_connexion_app():
         "api.spec.yaml",
         arguments=openapi_args,
         strict_validation=True,
-        validate_responses=True,
+        validate_responses=response_validation.validate_responses(),
+        validator_map=response_validation.get_validator_map(),
         resolver_error=405,
     )
     connexion_app.add_api(
         "internal_api.spec.yaml",
         arguments=openapi_args,
         strict_validation=True,
-        validate_responses=True,
+        validate_responses=response_validation.validate_responses(),
+        validator_map=response_validation.get_validator_map(),
         resolver_error=405,
     )
     connexion_app.add_api(
@@ -74,12 +97,16 @@ def create_connexion_app():
     flask_app.config["SQLALCHEMY_DATABASE_URI"] = db_config.db_uri
     flask_app.config["SQLALCHEMY_POOL_SIZE"] = db_config.db_pool_size
     flask_app.config["SQLALCHEMY_POOL_TIMEOUT"] = db_config.db_pool_timeout
+    flask_app.config["SQLALCHEMY_BINDS"] = replica.get_engine_binds()
     db.init_app(flask_app)
 
     flask_app.register_blueprint(v1_bp)
     flask_app.register_blueprint(internal_v1_bp)
     flask_app.register_blueprint(global_helpers_bp)
 
+    flask_app.cli.add_command(reconcile_dirty_baselines_command)
+    flask_app.cli.add_command(reconcile_mapped_system_counts_command)
+
     return connexion_app
 
 
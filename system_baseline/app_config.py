@@ -6,3 +6,38 @@ def get_app_name():
     small helper to get application name
     """
     return os.getenv("APP_NAME", "system-baseline")
+
+
+# reconciliation of baselines with dirty systems against inventory
+reconciler_batch_size = int(os.getenv("RECONCILER_BATCH_SIZE", "100"))
+inventory_batch_size = int(os.getenv("INVENTORY_BATCH_SIZE", "50"))
+inventory_max_workers = int(os.getenv("INVENTORY_MAX_WORKERS", "4"))
+# the service account inventory is called as, which needs inventory:hosts:read
+reconciler_service_account_client_id = os.getenv("RECONCILER_SERVICE_ACCOUNT_CLIENT_ID", "")
+reconciler_service_account_username = os.getenv(
+    "RECONCILER_SERVICE_ACCOUNT_USERNAME", "service-account-system-baseline-reconciler"
+)
+
+# RBAC permission checks that passed are cached per identity for this many seconds,
+# for up to this many identities per process; a TTL of 0 disables the cache
+rbac_cache_ttl = int(os.getenv("RBAC_CACHE_TTL", "60"))
+rbac_cache_maxsize = int(os.getenv("RBAC_CACHE_MAXSIZE", "1024"))
+
+# seconds between refreshes of the cached admin status report; 0 builds it on every call
+admin_status_refresh_interval = int(os.getenv("ADMIN_STATUS_REFRESH_INTERVAL", "300"))
+
+# seconds between refreshes of the baseline count gauges served on /metrics
+metrics_refresh_interval = int(os.getenv("METRICS_REFRESH_INTERVAL", "60"))
+
+# validation of responses against the API specification: "full", for tests and CI only,
+# "sampled" or "off", see system_baseline.response_validation
+response_validation = os.getenv("RESPONSE_VALIDATION", "full")
+response_validation_sample_rate = float(os.getenv("RESPONSE_VALIDATION_SAMPLE_RATE", "0.01"))
+
+# serve the public API operations that wait on RBAC with the async API, see
+# system_baseline.async_app
+async_api_enabled = os.getenv("ASYNC_API_ENABLED", "false").lower() == "true"
+
+# serialized baselines are cached per process, up to this many bytes of JSON; 0
+# disables the cache, see system_baseline.json_cache
+baseline_cache_max_bytes = int(os.getenv("BASELINE_CACHE_MAX_BYTES", "67108864"))
@@ -0,0 +1,110 @@
+"""
+the Connexion AsyncApp serving the operations of the public API that wait on RBAC,
+and the ASGI app that sends their requests to it and all other requests to the
+Connexion FlaskApp. Flask views run on a fixed pool of threads, each one held for
+as long as its view waits; async views hold no thread while they wait.
+"""
+
+import re
+
+from pathlib import Path
+
+from connexion import AsyncApp
+from connexion.resolver import Resolver
+from connexion.spec import Specification
+from kerlescan.exceptions import HTTPError
+
+from system_baseline import response_validation
+from system_baseline.async_views import v1 as async_v1
+
+
+ASYNC_OPERATIONS = {
+    "system_baseline.views.v1.list_systems_with_baseline": async_v1.list_systems_with_baseline,
+}
+
+HTTP_METHODS = {"get", "put", "post", "delete", "options", "head", "patch", "trace"}
+
+SPECIFICATION_PATH = Path(__file__).parent / "openapi" / "api.spec.yaml"
+
+HSTS_HEADER = (b"strict-transport-security", b"max-age=63072000; includeSubDomains; preload")
+
+
+def load_async_specification(arguments):
+    """
+    return the public API specification with only the operations in ASYNC_OPERATIONS
+    """
+    specification = Specification.load(SPECIFICATION_PATH, arguments=arguments)
+    raw_specification = specification.raw
+    paths = {}
+    for path, path_item in raw_specification["paths"].items():
+        async_path_item = {
+            key: value
+            for key, value in path_item.items()
+            if key not in HTTP_METHODS or value.get("operationId") in ASYNC_OPERATIONS
+        }
+        if HTTP_METHODS & set(async_path_item):
+            paths[path] = async_path_item
+    raw_specification["paths"] = paths
+    return Specification.from_dict(raw_specification)
+
+
+def create_async_dispatcher(connexion_app, arguments):
+    """
+    return the AsyncDispatcher for `connexion_app`, the Connexion FlaskApp serving all
+    operations the AsyncApp does not, with the specification rendered with `arguments`
+    """
+    async_v1.init_app(connexion_app.app)
+    specification = load_async_specification(arguments)
+
+    async_app = AsyncApp(__name__)
+    async_app.add_api(
+        specification.raw,
+        strict_validation=True,
+        validate_responses=response_validation.validate_responses(),
+        validator_map=response_validation.get_validator_map(),
+        resolver=Resolver(ASYNC_OPERATIONS.__getitem__),
+        resolver_error=405,
+    )
+    async_app.add_error_handler(HTTPError, async_v1.handle_http_error)
+    return AsyncDispatcher(connexion_app, async_app, get_async_routes(specification))
+
+
+def get_async_routes(specification):
+    """
+    return (method, path pattern) tuples matching the requests of the async operations
+    """
+    routes = []
+    for path, path_item in specification.raw["paths"].items():
+        pattern = re.sub(r"\\{[^/]+\\}", "[^/]+", re.escape(specification.base_path + path))
+        for method in HTTP_METHODS & set(path_item):
+            routes.append((method.upper(), re.compile(pattern)))
+    return routes
+
+
+class AsyncDispatcher:
+    """
+    ASGI app sending the requests of the async operations to `async_app` and all other
+    requests, lifespan events included, to `app`
+    """
+
+    def __init__(self, app, async_app, async_routes):
+        self.app = app
+        self.async_app = async_app
+        self.async_routes = async_routes
+
+    def is_async(self, scope):
+        return scope["type"] == "http" and any(
+            method == scope["method"] and pattern.fullmatch(scope["path"])
+            for method, pattern in self.async_routes
+        )
+
+    async def __call__(self, scope, receive, send):
+        if not self.is_async(scope):
+            return await self.app(scope, receive, send)
+
+        async def send_with_hsts(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [HSTS_HEADER]
+            await send(message)
+
+        await self.async_app(scope, receive, send_with_hsts)
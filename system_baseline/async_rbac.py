@@ -0,0 +1,79 @@
+"""
+RBAC permission checks for the async API. They are kerlescan's
+view_helpers.ensure_has_permission, the check the Flask app makes, run in worker
+threads so that the event loop is not blocked while RBAC is called. Passed checks are
+cached as in system_baseline.global_helpers, in a cache of their own so that the
+Flask app never reads a result of these checks.
+"""
+
+import asyncio
+import copy
+
+from functools import partial
+
+from anyio import to_thread
+from kerlescan import config, view_helpers
+
+from system_baseline import app_config, metrics
+from system_baseline.global_helpers import PermissionCache, permission_cache_key
+
+
+async_rbac_permission_cache = PermissionCache(
+    app_config.rbac_cache_ttl, app_config.rbac_cache_maxsize
+)
+
+
+def check_permission(kerlescan_request, logger, permissions, application):
+    """
+    run kerlescan's permission check and return the RBAC filters it produced
+    """
+    rbac_filters = {}
+    view_helpers.ensure_has_permission(
+        permissions=permissions,
+        application=application,
+        app_name=app_config.get_app_name(),
+        request=kerlescan_request,
+        logger=logger,
+        request_metric=metrics.rbac_requests,
+        exception_metric=metrics.rbac_exceptions,
+        rbac_filters=rbac_filters,
+    )
+    return rbac_filters
+
+
+async def ensure_has_permissions(kerlescan_request, logger, checks):
+    """
+    run the RBAC permission `checks`, a list of (permissions, application) tuples, for
+    the identity of `kerlescan_request` and return the RBAC filters they produced.
+
+    Checks that are not cached run concurrently, each one in a worker thread. Only
+    checks RBAC evaluated are cached, see global_helpers._rbac_is_evaluated; the async
+    API only serves public API operations.
+    """
+    auth_key = kerlescan_request.headers.get("x-rh-identity")
+    rbac_filters = {}
+    pending = []
+    for permissions, application in checks:
+        key = None
+        if auth_key is not None and config.enable_rbac:
+            key = permission_cache_key(auth_key, application, permissions)
+            cached_filters = async_rbac_permission_cache.get(key)
+            if cached_filters is not None:
+                rbac_filters.update(copy.deepcopy(cached_filters))
+                continue
+        pending.append((key, permissions, application))
+
+    results = await asyncio.gather(
+        *[
+            to_thread.run_sync(
+                partial(check_permission, kerlescan_request, logger, permissions, application)
+            )
+            for _, permissions, application in pending
+        ]
+    )
+
+    for (key, _, _), check_filters in zip(pending, results):
+        if key is not None:
+            async_rbac_permission_cache.set(key, check_filters)
+        rbac_filters.update(copy.deepcopy(check_filters))
+    return rbac_filters
@@ -0,0 +1,146 @@
+"""
+async versions of the public API operations that wait on RBAC, served by the
+Connexion AsyncApp when ASYNC_API_ENABLED is set, see system_baseline.app. RBAC is
+checked by kerlescan, see system_baseline.async_rbac, and the database is read on the
+synchronous engine, one short statement per request, both from worker threads.
+"""
+
+import json
+
+from functools import partial
+from http import HTTPStatus
+from types import SimpleNamespace
+
+from anyio import to_thread
+from connexion import request
+from connexion.lifecycle import ConnexionResponse
+from kerlescan import view_helpers
+from kerlescan.exceptions import HTTPError
+from kerlescan.view_helpers import validate_uuids
+
+from system_baseline import app_config, async_rbac
+from system_baseline.global_helpers import (
+    BASELINES_READ_PERMISSIONS,
+    INVENTORY_READ_PERMISSIONS,
+    NOTIFICATIONS_READ_PERMISSIONS,
+)
+from system_baseline.models import SystemBaseline
+from system_baseline.replica import replica_reads
+
+
+# the Flask app, for its logger and database session
+_flask_app = None
+
+
+def init_app(flask_app):
+    global _flask_app
+    _flask_app = flask_app
+
+
+def handle_http_error(connexion_request, error):
+    return ConnexionResponse(
+        status_code=error.status_code,
+        mimetype="application/json",
+        body=json.dumps({"message": error.message}),
+    )
+
+
+def _kerlescan_request():
+    """
+    kerlescan's helpers take a Flask request, of which they read what is set here
+    """
+    return SimpleNamespace(
+        path=request.url.path,
+        method=request.method,
+        url=str(request.url),
+        headers=request.headers,
+        remote_addr=request.client.host if request.client else None,
+    )
+
+
+def _ensure_request_allowed(kerlescan_request):
+    """
+    the checks the Flask app runs before every request, see system_baseline.global_helpers
+    """
+    logger = _flask_app.logger
+    view_helpers.log_username(logger=logger, request=kerlescan_request)
+    message = "logged username"
+    logger.audit(message, request=kerlescan_request)
+    view_helpers.ensure_entitled(
+        request=kerlescan_request, app_name=app_config.get_app_name(), logger=logger
+    )
+    view_helpers.ensure_org_id(
+        request=kerlescan_request, app_name=app_config.get_app_name(), logger=logger
+    )
+
+
+def _read_mapped_system_ids(baseline_id, account_number, org_id, **group_filters):
+    with _flask_app.app_context(), replica_reads():
+        if org_id:
+            query = SystemBaseline.query.filter(
+                SystemBaseline.org_id == org_id, SystemBaseline.id == baseline_id
+            )
+        else:
+            query = SystemBaseline.query.filter(
+                SystemBaseline.account == account_number, SystemBaseline.id == baseline_id
+            )
+        baseline = query.first()
+        if baseline is None:
+            return None
+        return baseline.mapped_system_ids(**group_filters)
+
+
+async def list_systems_with_baseline(baseline_id, group_ids=None, group_names=None):
+    kerlescan_request = _kerlescan_request()
+    logger = _flask_app.logger
+    _ensure_request_allowed(kerlescan_request)
+    rbac_filters = await async_rbac.ensure_has_permissions(
+        kerlescan_request,
+        logger,
+        [
+            (BASELINES_READ_PERMISSIONS, "drift"),
+            (NOTIFICATIONS_READ_PERMISSIONS, "drift"),
+            (INVENTORY_READ_PERMISSIONS, "inventory"),
+        ],
+    )
+    validate_uuids([baseline_id])
+    account_number = view_helpers.get_account_number(kerlescan_request)
+    org_id = view_helpers.get_org_id(kerlescan_request)
+
+    api_group_filters = []
+    if group_ids:
+        api_group_filters = api_group_filters + [
+            {"id": None} if group_id == "" else {"id": group_id} for group_id in group_ids
+        ]
+    if group_names:
+        api_group_filters = api_group_filters + [{"name": group_name} for group_name in group_names]
+
+    try:
+        system_ids = await to_thread.run_sync(
+            partial(
+                _read_mapped_system_ids,
+                baseline_id,
+                account_number,
+                org_id,
+                rbac_group_filters=rbac_filters.get("group.id", None),
+                api_group_filters=api_group_filters,
+            )
+        )
+    except ValueError as error:
+        message = str(error)
+        logger.audit(message, request=kerlescan_request, success=False)
+        raise HTTPError(HTTPStatus.BAD_REQUEST, message=message)
+    except Exception:
+        message = "Unknown error when reading mapped system ids"
+        logger.audit(message, request=kerlescan_request, success=False)
+        raise
+
+    if system_ids is None:
+        message = "baseline not found"
+        logger.audit(message, request=kerlescan_request, success=False)
+        raise HTTPError(HTTPStatus.NOT_FOUND, message=message)
+
+    message = "read baseline"
+    logger.audit(message, request=kerlescan_request, success=True)
+
+    return {"system_ids": system_ids}
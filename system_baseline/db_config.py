@@ -23,3 +23,15 @@ _db_name = load_db_setting("BASELINE_DB_NAME", "name", "baselinedb")
 db_uri = f"postgresql://{_db_user}:{_db_password}@{_db_host}:{_db_port}/{_db_name}"
 db_pool_timeout = int(os.getenv("BASELINE_DB_POOL_TIMEOUT", "5"))
 db_pool_size = int(os.getenv("BASELINE_DB_POOL_SIZE", "5"))
+
+# optional read replica of the same database, see system_baseline.replica
+_db_replica_host = os.getenv("BASELINE_DB_REPLICA_HOST")
+_db_replica_port = os.getenv("BASELINE_DB_REPLICA_PORT", _db_port)
+
+db_replica_uri = None
+if _db_replica_host:
+    db_replica_uri = (
+        f"postgresql://{_db_user}:{_db_password}@{_db_replica_host}:{_db_replica_port}/{_db_name}"
+    )
+db_replica_max_lag = float(os.getenv("BASELINE_DB_REPLICA_MAX_LAG", "10"))
+db_replica_lag_check_interval = int(os.getenv("BASELINE_DB_REPLICA_LAG_CHECK_INTERVAL", "5"))
@@ -18,11 +18,26 @@ class HTTPError(Exception):
 
 
 class FactValidationError(Exception):
-    def __init__(self, message=""):
+    def __init__(self, message="", violations=None):
         """
         Raise this exception for fact validation errors
 
         :param message:     optional error message for the exception
+        :param violations:  optional list of (JSON pointer, message) tuples, one
+                            for each violation found
         """
         super(FactValidationError, self).__init__()
         self.message = message
+        self.violations = violations or []
+
+
+class RestrictedInventoryAccess(Exception):
+    def __init__(self, message=""):
+        """
+        Raise this exception when the reconciler's identity cannot read every host
+        of a tenant, so that hosts it does not see cannot be told from deleted ones
+
+        :param message:     optional error message for the exception
+        """
+        super(RestrictedInventoryAccess, self).__init__(message)
+        self.message = message
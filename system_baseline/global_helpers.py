@@ -1,7 +1,13 @@
+import copy
+import hashlib
+import threading
+import time
+
+from collections import OrderedDict
 from http import HTTPStatus
 
 from flask import Blueprint, current_app, g, request
-from kerlescan import view_helpers
+from kerlescan import config, view_helpers
 from kerlescan.exceptions import HTTPError
 
 from system_baseline import app_config, metrics
@@ -10,6 +16,132 @@ from system_baseline import app_config, metrics
 global_helpers_bp = Blueprint("global_helpers", __name__)
 
 
+class PermissionCache:
+    """
+    process-local cache of passed RBAC permission checks, with a TTL and LRU
+    eviction once `maxsize` entries are held. Values are the RBAC filters the
+    check produced.
+    """
+
+    def __init__(self, ttl, maxsize):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+rbac_permission_cache = PermissionCache(app_config.rbac_cache_ttl, app_config.rbac_cache_maxsize)
+
+
+def _ensure_has_permission(permissions, application, app_name):
+    """
+    check RBAC permissions for the request's identity at most once per request and
+    once per cache TTL, updating g.rbac_filters with the filters the check produced.
+    Only passed checks that RBAC evaluated are cached; denials and RBAC errors are
+    raised every time.
+    """
+    if g.get("rbac_filters") is None:
+        g.rbac_filters = {}
+    if g.get("rbac_checks_passed") is None:
+        g.rbac_checks_passed = set()
+
+    identity = request.headers.get("x-rh-identity")
+    if identity is None or not _rbac_is_evaluated():
+        return _check_permission(permissions, application, app_name, g.rbac_filters)
+
+    key = permission_cache_key(identity, application, permissions)
+    if key in g.rbac_checks_passed:
+        return
+
+    rbac_filters = rbac_permission_cache.get(key)
+    if rbac_filters is None:
+        rbac_filters = {}
+        _check_permission(permissions, application, app_name, rbac_filters)
+        rbac_permission_cache.set(key, rbac_filters)
+
+    g.rbac_filters.update(copy.deepcopy(rbac_filters))
+    g.rbac_checks_passed.add(key)
+
+
+def _rbac_is_evaluated():
+    """
+    whether kerlescan's permission check asks RBAC about the current request. It passes
+    without asking RBAC when RBAC is disabled and for the management API and openapi.json,
+    and such a pass must not be cached for the identity, so only checks of the public
+    API are cached.
+    """
+    public_api_path = "/%s/%s/v1/" % (
+        config.path_prefix.strip("/"),
+        app_config.get_app_name().strip("/"),
+    )
+    return (
+        config.enable_rbac
+        and request.path.startswith(public_api_path)
+        and not request.path.endswith("openapi.json")
+    )
+
+
+def permission_cache_key(identity, application, permissions):
+    return (
+        hashlib.sha256(identity.encode("utf-8")).hexdigest(),
+        application,
+        tuple(tuple(permission) for permission in permissions),
+    )
+
+
+def _check_permission(permissions, application, app_name, rbac_filters):
+    return view_helpers.ensure_has_permission(
+        permissions=permissions,
+        application=application,
+        app_name=app_name,
+        request=request,
+        logger=current_app.logger,
+        request_metric=metrics.rbac_requests,
+        exception_metric=metrics.rbac_exceptions,
+        rbac_filters=rbac_filters,
+    )
+
+
+# permissions consist of a list of "or" permissions where any will work,
+# and each sublist is a set of "and" permissions that all must be true.
+BASELINES_READ_PERMISSIONS = [["drift:*:*"], ["drift:baselines:read"]]
+NOTIFICATIONS_READ_PERMISSIONS = [
+    ["drift:*:*"],
+    ["drift:notifications:read", "drift:baselines:read"],
+]
+INVENTORY_READ_PERMISSIONS = [
+    ["inventory:*:*"],
+    ["inventory:*:read"],
+    ["inventory:hosts:*"],
+    ["inventory:hosts:read"],
+]
+
+
 @global_helpers_bp.before_app_request
 def log_username():
     view_helpers.log_username(logger=current_app.logger, request=request)
@@ -39,17 +171,10 @@ def ensure_rbac_baselines_read():
     # permissions=[["drift:*:*"], ["drift:notifications:read", "drift:baselines:read"]]
     # If we just have *:*, it works, but if not, we need both notifications:read and
     # baselines:read in order to allow access.
-    if g.get("rbac_filters") is None:
-        g.rbac_filters = {}
-    return view_helpers.ensure_has_permission(
-        permissions=[["drift:*:*"], ["drift:baselines:read"]],
+    return _ensure_has_permission(
+        permissions=BASELINES_READ_PERMISSIONS,
         application="drift",
         app_name="system-baseline",
-        request=request,
-        logger=current_app.logger,
-        request_metric=metrics.rbac_requests,
-        exception_metric=metrics.rbac_exceptions,
-        rbac_filters=g.get("rbac_filters"),
     )
 
 
@@ -65,85 +190,49 @@ def ensure_rbac_baselines_write():
         HTTPStatus.NOT_IMPLEMENTED, message="Write permission decommissioned on Sep. 30,, 2024."
     )
 
-    if g.get("rbac_filters") is None:
-        g.rbac_filters = {}
-    return view_helpers.ensure_has_permission(
+    return _ensure_has_permission(
         permissions=[["drift:*:*"], ["drift:baselines:write"]],
         application="drift",
         app_name="system-baseline",
-        request=request,
-        logger=current_app.logger,
-        request_metric=metrics.rbac_requests,
-        exception_metric=metrics.rbac_exceptions,
-        rbac_filters=g.get("rbac_filters"),
     )
 
 
 def ensure_rbac_inventory_read():
-    if g.get("rbac_filters") is None:
-        g.rbac_filters = {}
-    return view_helpers.ensure_has_permission(
-        permissions=[
-            ["inventory:*:*"],
-            ["inventory:*:read"],
-            ["inventory:hosts:*"],
-            ["inventory:hosts:read"],
-        ],
+    return _ensure_has_permission(
+        permissions=INVENTORY_READ_PERMISSIONS,
         application="inventory",
         app_name="system-baseline",
-        request=request,
-        logger=current_app.logger,
-        request_metric=metrics.rbac_requests,
-        exception_metric=metrics.rbac_exceptions,
-        rbac_filters=g.get("rbac_filters"),
     )
 
 
 def ensure_rbac_notifications_read():
-    if g.get("rbac_filters") is None:
-        g.rbac_filters = {}
     # permissions consist of a list of "or" permissions where any will work,
     # and each sublist is a set of "and" permissions that all must be true.
     # For example:
     # permissions=[["drift:*:*"], ["drift:notifications:read", "drift:baselines:read"]]
     # If we just have *:*, it works, but if not, we need both notifications:read and
     # baselines:read in order to allow access.
-    return view_helpers.ensure_has_permission(
-        permissions=[
-            ["drift:*:*"],
-            ["drift:notifications:read", "drift:baselines:read"],
-        ],
+    return _ensure_has_permission(
+        permissions=NOTIFICATIONS_READ_PERMISSIONS,
         application="drift",
         app_name="system_baseline",
-        request=request,
-        logger=current_app.logger,
-        request_metric=metrics.rbac_requests,
-        exception_metric=metrics.rbac_exceptions,
-        rbac_filters=g.get("rbac_filters"),
     )
 
 
 def ensure_rbac_notifications_write():
-    if g.get("rbac_filters") is None:
-        g.rbac_filters = {}
     # permissions consist of a list of "or" permissions where any will work,
     # and each sublist is a set of "and" permissions that all must be true.
     # For example:
     # permissions=[["drift:*:*"], ["drift:notifications:read", "drift:baselines:read"]]
     # If we just have *:*, it works, but if not, we need both notifications:read and
     # baselines:read in order to allow access.
-    return view_helpers.ensure_has_permission(
+    return _ensure_has_permission(
         permissions=[
             ["drift:*:*"],
             ["drift:notifications:write", "drift:baselines:read"],
         ],
         application="drift",
         app_name="system_baseline",
-        request=request,
-        logger=current_app.logger,
-        request_metric=metrics.rbac_requests,
-        exception_metric=metrics.rbac_exceptions,
-        rbac_filters=g.get("rbac_filters"),
     )
 
 
@@ -4,13 +4,12 @@ from kerlescan.view_helpers import validate_uuids
 
 from system_baseline import metrics
 from system_baseline.models import SystemBaselineMappedSystem
+from system_baseline.replica import reads_from_replica
 from system_baseline.version import app_version
 
 
 section = Blueprint("internal_v1", __name__)
 
-FACTS_MAXSIZE = 2**19  # 512KB
-
 
 def get_version():
     """
@@ -21,6 +20,7 @@ def get_version():
 
 @metrics.baseline_fetch_all_requests.time()
 @metrics.api_exceptions.count_exceptions()
+@reads_from_replica
 def get_baselines_by_system_id(system_id=None):
     account_number = view_helpers.get_account_number(request)
     org_id = view_helpers.get_org_id(request)
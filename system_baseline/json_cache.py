@@ -0,0 +1,65 @@
+"""
+Process-local cache of serialized baseline facts.
+
+Facts are cached as JSON text keyed by (id, modified_on), so the facts of a baseline
+that is modified are looked up under a new key and their old JSON ages out of the
+cache. Only the facts are cached: the other fields of a baseline, such as org_id, may
+be written without modified_on being bumped.
+"""
+
+import threading
+
+from collections import OrderedDict
+
+from system_baseline import app_config, metrics
+
+
+class JsonFragmentCache:
+    """
+    LRU cache of JSON text, evicting the least recently used entries once the text it
+    holds is more than `max_bytes` bytes when UTF-8 encoded. A `max_bytes` of 0
+    disables the cache.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        if entry is None:
+            metrics.baseline_cache_misses.inc()
+            return None
+        metrics.baseline_cache_hits.inc()
+        return entry[0]
+
+    def set(self, key, fragment):
+        size = len(fragment.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        evicted = 0
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.size -= previous[1]
+            self._entries[key] = (fragment, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size -= evicted_size
+                evicted += 1
+        if evicted:
+            metrics.baseline_cache_evictions.inc(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+
+baseline_json_cache = JsonFragmentCache(app_config.baseline_cache_max_bytes)
@@ -0,0 +1,48 @@
+"""
+Triggers keeping system_baselines.mapped_system_count up to date.
+
+They run on every insert and delete of mapped systems, whichever code path runs
+them. Mapped systems never move between baselines, so updates are not counted.
+
+The DDL is run both when the tables are created from the models and by the
+e5a7c3d90b18 migration, so changing it needs a new migration as well.
+"""
+
+CREATE_TRIGGERS = """
+CREATE OR REPLACE FUNCTION update_mapped_system_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        UPDATE system_baselines
+        SET mapped_system_count = mapped_system_count + added.count
+        FROM (
+            SELECT system_baseline_id, count(*) AS count FROM new_rows GROUP BY system_baseline_id
+        ) AS added
+        WHERE system_baselines.id = added.system_baseline_id;
+    ELSE
+        UPDATE system_baselines
+        SET mapped_system_count = mapped_system_count - removed.count
+        FROM (
+            SELECT system_baseline_id, count(*) AS count FROM old_rows GROUP BY system_baseline_id
+        ) AS removed
+        WHERE system_baselines.id = removed.system_baseline_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER mapped_system_count_insert
+AFTER INSERT ON system_baseline_mapped_systems
+REFERENCING NEW TABLE AS new_rows
+FOR EACH STATEMENT EXECUTE PROCEDURE update_mapped_system_count();
+
+CREATE TRIGGER mapped_system_count_delete
+AFTER DELETE ON system_baseline_mapped_systems
+REFERENCING OLD TABLE AS old_rows
+FOR EACH STATEMENT EXECUTE PROCEDURE update_mapped_system_count();
+"""
+
+DROP_TRIGGERS = """
+DROP TRIGGER IF EXISTS mapped_system_count_delete ON system_baseline_mapped_systems;
+DROP TRIGGER IF EXISTS mapped_system_count_insert ON system_baseline_mapped_systems;
+DROP FUNCTION IF EXISTS update_mapped_system_count();
+"""
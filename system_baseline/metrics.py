@@ -63,3 +63,18 @@ baseline_account_count_hundred_plus = Gauge(
 
 rbac_requests = Histogram("baseline_rbac_service_requests", "rbac service call stats")
 rbac_exceptions = Counter("baseline_rbac_exceptions", "count of exceptions raised by rbac service")
+
+response_validation_violations = Counter(
+    "baseline_response_validation_violations",
+    "count of responses that do not conform to the API specification",
+)
+
+baseline_cache_hits = Counter(
+    "baseline_cache_hits", "count of baselines served from the serialized baseline cache"
+)
+baseline_cache_misses = Counter(
+    "baseline_cache_misses", "count of baselines serialized because they were not cached"
+)
+baseline_cache_evictions = Counter(
+    "baseline_cache_evictions", "count of baselines evicted from the serialized baseline cache"
+)
@@ -1,47 +1,50 @@
-from flask import current_app, jsonify, request
+from flask import current_app, jsonify
 from kerlescan.metrics_registry import get_registry
 from prometheus_client import generate_latest
 from sqlalchemy.sql import text
 
+from system_baseline import app_config
 from system_baseline import metrics as baseline_metrics
-from system_baseline.models import SystemBaseline, db
-
-
-RANGES = text(
-    "select count(*) from"
-    " (select count(org_id) from system_baselines group by org_id) x"
-    " where count between :low and :high"
+from system_baseline.models import db
+from system_baseline.periodic import PeriodicRefresh
+from system_baseline.replica import reads_from_replica
+
+
+# all baseline gauges in one pass over system_baselines, grouped by org_id. Baselines
+# without an org_id are in the total, but count as none in the bucket of their group
+BASELINE_COUNTS = text(
+    "select coalesce(sum(baselines), 0) as baselines, count(*) as accounts,"
+    " count(*) filter (where count between 0 and 10) as accounts_ones,"
+    " count(*) filter (where count between 10 and 100) as accounts_tens,"
+    " count(*) filter (where count >= 100) as accounts_hundred_plus"
+    " from (select count(*) as baselines, count(org_id) from system_baselines"
+    " group by org_id) x"
 )
 
-BIGINT_MAX = 9223372036854775807
-
 
+@reads_from_replica
 def _update_baseline_counts():
     """
-    The baseline counts are updated when metrics are fetched via SQL
+    The baseline counts are updated via SQL by a background collector, see
+    baseline_gauges
     """
-    total_baselines = SystemBaseline.query.count()
-    total_accounts = SystemBaseline.query.distinct(SystemBaseline.org_id).count()
+    counts = db.session.execute(BASELINE_COUNTS).one()
 
-    message = "counted baselines"
-    current_app.logger.audit(message, request=request, success=True)
+    baseline_metrics.baseline_count.set(counts.baselines)
+    baseline_metrics.baseline_account_count.set(counts.accounts)
+    baseline_metrics.baseline_account_count_ones.set(counts.accounts_ones)
+    baseline_metrics.baseline_account_count_tens.set(counts.accounts_tens)
+    baseline_metrics.baseline_account_count_hundred_plus.set(counts.accounts_hundred_plus)
 
-    with db.engine.connect() as connection:
-        total_accounts_ones = connection.execute(RANGES, {"low": 0, "high": 10}).scalar()
-        total_accounts_tens = connection.execute(RANGES, {"low": 10, "high": 100}).scalar()
-        total_accounts_hundred_plus = connection.execute(
-            RANGES, {"low": 100, "high": BIGINT_MAX}
-        ).scalar()
 
-    baseline_metrics.baseline_count.set(total_baselines)
-    baseline_metrics.baseline_account_count.set(total_accounts)
-    baseline_metrics.baseline_account_count_ones.set(total_accounts_ones)
-    baseline_metrics.baseline_account_count_tens.set(total_accounts_tens)
-    baseline_metrics.baseline_account_count_hundred_plus.set(total_accounts_hundred_plus)
+baseline_gauges = PeriodicRefresh(
+    "baseline-gauges-collector", _update_baseline_counts, app_config.metrics_refresh_interval
+)
 
 
 def metrics():
-    _update_baseline_counts()
+    # the gauges are only updated on the first scrape, then in the background
+    baseline_gauges.get(current_app._get_current_object())
     registry = get_registry()
     prometheus_data = generate_latest(registry)
     return prometheus_data
@@ -3,23 +3,85 @@ import uuid
 from datetime import datetime
 
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import cast, func, or_, update
-from sqlalchemy.dialects.postgresql import JSONB, UUID
-from sqlalchemy.orm import relationship, validates
+from flask_sqlalchemy.session import Session
+from sqlalchemy import (
+    DDL,
+    any_,
+    cast,
+    delete,
+    event,
+    func,
+    literal,
+    or_,
+    select,
+    text,
+    update,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, UUID, insert
+from sqlalchemy.orm import column_property, relationship, validates
 from sqlalchemy.schema import ForeignKey, UniqueConstraint
 
-from system_baseline import validators
+from system_baseline import mapped_system_count, validators
+from system_baseline.replica import REPLICA_BIND_KEY, is_read_only, is_snapshot, use_replica
 
 
-db = SQLAlchemy()
+class RoutingSession(Session):
+    """
+    session sending reads to the read replica inside `reads_from_replica` functions,
+    see system_baseline.replica
+    """
 
-FACTS_MAXSIZE = 2**19  # 512KB
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if (
+            bind is None
+            and not self._flushing
+            and not getattr(clause, "is_dml", False)
+            and use_replica()
+        ):
+            return self._db.engines[REPLICA_BIND_KEY]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, "after_begin")
+def begin_read_only(session, transaction, connection):
+    """
+    make the transactions begun by `reads_from_replica` functions READ ONLY, so that they
+    take no write locks and write no WAL, and those begun by `reads_snapshot_from_replica`
+    functions REPEATABLE READ as well
+    """
+    if is_snapshot():
+        connection.exec_driver_sql("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+    elif is_read_only():
+        connection.exec_driver_sql("SET TRANSACTION READ ONLY")
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 
 
 class SystemBaseline(db.Model):
     __tablename__ = "system_baselines"
-    # do not allow two records in the same account to have the same display name
-    __table_args__ = (UniqueConstraint("account", "display_name", name="_account_display_name_uc"),)
+    __table_args__ = (
+        # do not allow two records in the same account to have the same display name
+        UniqueConstraint("account", "display_name", name="_account_display_name_uc"),
+        UniqueConstraint("org_id", "display_name", name="_org_id_display_name_uc"),
+        # one index per sort order, for keyset pagination within an org
+        db.Index("ix_system_baselines_org_id_display_name_id", "org_id", "display_name", "id"),
+        db.Index("ix_system_baselines_org_id_created_on_id", "org_id", "created_on", "id"),
+        db.Index("ix_system_baselines_org_id_modified_on_id", "org_id", "modified_on", "id"),
+        # display name searches within an org, on lower(display_name): substrings with
+        # trigrams, prefixes with pattern ordering. See DISPLAY_NAME_SEARCH_EXTENSIONS.
+        db.Index(
+            "ix_system_baselines_org_id_display_name_trgm",
+            "org_id",
+            text("lower(display_name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ),
+        db.Index(
+            "ix_system_baselines_org_id_display_name_prefix",
+            "org_id",
+            text("lower(display_name) text_pattern_ops"),
+        ),
+    )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     account = db.Column(db.String(10))
@@ -30,18 +92,18 @@ class SystemBaseline(db.Model):
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
     baseline_facts = db.Column(JSONB)
+    # counted by the database so that listing baselines does not need to load the facts
+    fact_count = column_property(func.jsonb_array_length(baseline_facts))
     mapped_systems = relationship(
         "SystemBaselineMappedSystem",
         cascade="all, delete, delete-orphan",
         lazy="dynamic",
     )
+    # maintained by the database, see MAPPED_SYSTEM_COUNT_TRIGGERS
+    mapped_system_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
     dirty_systems = db.Column(db.Boolean, default=False, nullable=True)
     notifications_enabled = db.Column(db.Boolean, default=True, nullable=False)
 
-    @property
-    def fact_count(self):
-        return len(self.baseline_facts)
-
     @validates("baseline_facts")
     def validate_facts(self, key, value):
         validators.check_facts_length(value)
@@ -59,6 +121,51 @@ class SystemBaseline(db.Model):
             for filter in filters
         ]
 
+    @classmethod
+    def get_page_query(cls, tenant_filter, filters, rbac_group_filters=None, keyset_filter=None):
+        """
+        return a query for baselines matching `filters` that also selects the
+        filtered count, the tenant's total count and each baseline's mapped
+        system count, so a page of baselines can be read in one round trip.
+        `keyset_filter` restricts the rows to those after a pagination cursor
+        without affecting the filtered count.
+
+        each result row is (baseline, count, total_available, mapped_system_count).
+        """
+        if keyset_filter is None:
+            count = func.count().over()
+        else:
+            # the rows before the cursor are not selected, so count separately
+            count = (
+                select(func.count())
+                .select_from(cls)
+                .where(*filters)
+                .correlate(None)
+                .scalar_subquery()
+            )
+            filters = [*filters, keyset_filter]
+
+        total_available = select(func.count()).select_from(cls).where(tenant_filter).correlate(None)
+
+        if rbac_group_filters is None:
+            mapped_system_count = cls.mapped_system_count
+        else:
+            mapped_system_count = (
+                select(func.count(SystemBaselineMappedSystem.id))
+                .where(
+                    SystemBaselineMappedSystem.system_baseline_id == cls.id,
+                    or_(*cls.get_groups_query_filters(rbac_group_filters)),
+                )
+                .scalar_subquery()
+            )
+
+        return db.session.query(
+            cls,
+            count.label("count"),
+            total_available.scalar_subquery().label("total_available"),
+            mapped_system_count.label("mapped_system_count"),
+        ).filter(*filters)
+
     def mapped_system_ids(self, rbac_group_filters=None, api_group_filters=None):
         # rbac_group_filters behaviour
         # format is a list of dictionaries
@@ -101,7 +208,7 @@ class SystemBaseline(db.Model):
         if not withhold_system_ids:
             json_dict["system_ids"] = self.mapped_system_ids()
         if not withhold_systems_count:
-            json_dict["mapped_system_count"] = len(self.mapped_system_ids())
+            json_dict["mapped_system_count"] = self.mapped_system_count
         return json_dict
 
     def validate_existing_system(self, system_id):
@@ -120,17 +227,161 @@ class SystemBaseline(db.Model):
         db.session.add(new_mapped_system)
 
     def remove_mapped_system(self, system_id):
-        system_id_removed = False
-        for mapped_system in self.mapped_systems:
-            if str(mapped_system.system_id) == str(system_id):
-                self.mapped_systems.remove(mapped_system)
-                system_id_removed = True
-                break
-        if not system_id_removed:
-            # do we want to raise exception here?
-            raise ValueError(
-                "Failed to remove system id %s from mapped systems - not in list" % system_id
+        self.remove_mapped_systems([system_id])
+
+    def add_mapped_systems(self, system_ids, groups=None):
+        """
+        map a list of systems to this baseline with a single INSERT ... ON CONFLICT DO
+        NOTHING. `groups` is an optional dict of inventory groups keyed by system ID.
+        Raises ValueError if any system is already associated with this baseline, in
+        which case no system is mapped.
+        """
+        if not system_ids:
+            return
+        if groups is None:
+            groups = {}
+
+        db.session.flush()  # this baseline needs to be persisted before it can be referenced
+        insert_query = (
+            insert(SystemBaselineMappedSystem)
+            .values(
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "account": self.account,
+                        "org_id": self.org_id,
+                        "system_baseline_id": self.id,
+                        "system_id": system_id,
+                        "groups": groups.get(system_id),
+                    }
+                    for system_id in system_ids
+                ]
+            )
+            .on_conflict_do_nothing(constraint="_system_baseline_mapped_system_uc")
+            .returning(SystemBaselineMappedSystem.system_id)
+        )
+        # the savepoint rolls back the systems inserted along with the existing ones
+        with db.session.begin_nested():
+            added_system_ids = {str(system_id) for system_id in db.session.scalars(insert_query)}
+            existing_system_ids = [
+                str(system_id) for system_id in system_ids if str(system_id) not in added_system_ids
+            ]
+            if existing_system_ids:
+                raise ValueError(
+                    "Systems %s already associated with this baseline"
+                    % ", ".join(existing_system_ids)
+                )
+        db.session.expire(self, ["mapped_system_count"])
+
+    def remove_mapped_systems(self, system_ids):
+        """
+        unmap a list of systems from this baseline with a single DELETE ... RETURNING.
+        Raises ValueError if any system is not associated with this baseline, in which
+        case no system is unmapped.
+        """
+        if not system_ids:
+            return
+
+        delete_query = (
+            delete(SystemBaselineMappedSystem)
+            .where(
+                SystemBaselineMappedSystem.system_baseline_id == self.id,
+                SystemBaselineMappedSystem.system_id
+                == any_(cast([str(system_id) for system_id in system_ids], ARRAY(UUID))),
             )
+            .returning(SystemBaselineMappedSystem.system_id)
+            .execution_options(synchronize_session="fetch")
+        )
+        # the savepoint restores the systems deleted along with the missing ones
+        with db.session.begin_nested():
+            removed_system_ids = {str(system_id) for system_id in db.session.scalars(delete_query)}
+            missing_system_ids = [
+                str(system_id)
+                for system_id in system_ids
+                if str(system_id) not in removed_system_ids
+            ]
+            if missing_system_ids:
+                raise ValueError(
+                    "Failed to remove system id %s from mapped systems - not in list"
+                    % ", ".join(missing_system_ids)
+                )
+        db.session.expire(self, ["mapped_system_count"])
+
+    @classmethod
+    def copy(cls, baseline_id, display_name, tenant_filter):
+        """
+        copy a baseline of the tenant to a new baseline named `display_name` with a
+        single INSERT ... SELECT, so the facts never leave the database. The copy has
+        no mapped systems.
+
+        returns the copy, without its facts, or None if nothing was copied because the
+        baseline does not exist or the tenant already has a baseline with that name.
+        """
+        now = datetime.utcnow()
+        copied_columns = {
+            "id": literal(uuid.uuid4(), cls.id.type),
+            "account": cls.account,
+            "org_id": cls.org_id,
+            "display_name": literal(display_name, cls.display_name.type),
+            "created_on": literal(now, cls.created_on.type),
+            "modified_on": literal(now, cls.modified_on.type),
+            "baseline_facts": cls.baseline_facts,
+            "mapped_system_count": literal(0),
+            # the copy has no mapped systems for the reconciler to check
+            "dirty_systems": literal(False),
+            "notifications_enabled": cls.notifications_enabled,
+        }
+        insert_query = (
+            insert(cls)
+            .from_select(
+                list(copied_columns),
+                select(*copied_columns.values()).where(tenant_filter, cls.id == baseline_id),
+            )
+            # an existing display name violates one of the display name unique constraints
+            .on_conflict_do_nothing()
+            .returning(
+                cls.id,
+                cls.account,
+                cls.org_id,
+                cls.display_name,
+                cls.created_on,
+                cls.modified_on,
+                cls.mapped_system_count,
+                cls.notifications_enabled,
+                func.jsonb_array_length(cls.baseline_facts).label("fact_count"),
+            )
+        )
+        copied = db.session.execute(insert_query).one_or_none()
+        if copied is None:
+            return None
+        return cls(**copied._asdict())
+
+    @classmethod
+    def reconcile_mapped_system_counts(cls):
+        """
+        recount the mapped systems of every baseline and repair the counts that
+        drifted. Returns the IDs of the repaired baselines.
+        """
+        mapped_system_counts = (
+            select(cls.id, func.count(SystemBaselineMappedSystem.id).label("count"))
+            .outerjoin(
+                SystemBaselineMappedSystem,
+                SystemBaselineMappedSystem.system_baseline_id == cls.id,
+            )
+            .group_by(cls.id)
+            .subquery()
+        )
+        update_query = (
+            update(cls)
+            .where(
+                cls.id == mapped_system_counts.c.id,
+                cls.mapped_system_count != mapped_system_counts.c.count,
+            )
+            .values(mapped_system_count=mapped_system_counts.c.count)
+            .returning(cls.id)
+            .execution_options(synchronize_session=False)
+        )
+        return list(db.session.scalars(update_query))
 
 
 class SystemBaselineMappedSystem(db.Model):
@@ -139,6 +390,13 @@ class SystemBaselineMappedSystem(db.Model):
         UniqueConstraint(
             "system_baseline_id", "system_id", name="_system_baseline_mapped_system_uc"
         ),
+        # mapped systems are always looked up within a tenant
+        db.Index("ix_system_baseline_mapped_systems_org_id_system_id", "org_id", "system_id"),
+        db.Index(
+            "ix_system_baseline_mapped_systems_org_id_system_baseline_id",
+            "org_id",
+            "system_baseline_id",
+        ),
     )
 
     id = db.Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -169,25 +427,6 @@ class SystemBaselineMappedSystem(db.Model):
         query.delete(synchronize_session="fetch")
         db.session.commit()
 
-    @classmethod
-    def get_mapped_system_count(cls, account_number, org_id, rbac_group_filters=None):
-        mapped_systems_query = cls.query
-        if rbac_group_filters is not None:
-            mapped_systems_query = mapped_systems_query.filter(
-                or_(*SystemBaseline.get_groups_query_filters(rbac_group_filters))
-            )
-
-        query = mapped_systems_query.with_entities(
-            cls.system_baseline_id, func.count(cls.system_baseline_id)
-        ).group_by(cls.system_baseline_id)
-
-        if org_id:
-            results = query.filter(cls.org_id == org_id).all()
-        else:
-            results = query.filter(cls.account == account_number).all()
-
-        return results
-
     @classmethod
     def update_systems(cls, system_id, groups=None):
         if groups is None:
@@ -205,3 +444,17 @@ class SystemBaselineMappedSystem(db.Model):
             cls(id=data[0], system_id=data[1], system_baseline_id=data[2], groups=data[3])
             for data in updated_systems_data
         ]
+
+
+# pg_trgm for the trigram operator class, btree_gin for org_id in a GIN index. The
+# c4d19e8f2a67 migration creates them in existing databases.
+DISPLAY_NAME_SEARCH_EXTENSIONS = DDL(
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm; CREATE EXTENSION IF NOT EXISTS btree_gin"
+)
+event.listen(SystemBaseline.__table__, "before_create", DISPLAY_NAME_SEARCH_EXTENSIONS)
+
+# keep system_baselines.mapped_system_count up to date, see
+# system_baseline.mapped_system_count. The e5a7c3d90b18 migration creates the same
+# triggers in existing databases.
+MAPPED_SYSTEM_COUNT_TRIGGERS = DDL(mapped_system_count.CREATE_TRIGGERS)
+event.listen(SystemBaselineMappedSystem.__table__, "after_create", MAPPED_SYSTEM_COUNT_TRIGGERS)
@@ -0,0 +1,58 @@
+import threading
+
+
+class PeriodicRefresh:
+    """
+    keeps a value computed by `refresh` up to date in the background.
+
+    `refresh` is called in the app context every `interval` seconds by a daemon
+    thread, which is started by the first `get` so that each worker process runs
+    its own after forking. Readers get the last computed value and never wait on
+    a refresh, except for the very first one. With an `interval` of 0 the value is
+    computed on every `get`.
+    """
+
+    def __init__(self, name, refresh, interval):
+        self.name = name
+        self.refresh = refresh
+        self.interval = interval
+        self._value = None
+        self._refreshed = False
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def get(self, app):
+        """
+        return the last computed value, computing it first if there is none yet
+        """
+        if self.interval <= 0:
+            return self._refresh(app)
+
+        with self._lock:
+            if not self._refreshed:
+                self._value = self._refresh(app)
+                self._refreshed = True
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, args=(app,), name=self.name, daemon=True
+                )
+                self._thread.start()
+            return self._value
+
+    def stop(self):
+        self._stopped.set()
+
+    def _run(self, app):
+        while not self._stopped.wait(self.interval):
+            try:
+                value = self._refresh(app)
+            except Exception:
+                app.logger.exception("Unknown error when refreshing %s" % self.name)
+                continue
+            with self._lock:
+                self._value = value
+
+    def _refresh(self, app):
+        with app.app_context():
+            return self.refresh()
@@ -0,0 +1,317 @@
+"""
+Reconciliation of baselines flagged with dirty systems (DRFT-830), and of the
+denormalized mapped system counts of baselines.
+
+Baselines are flagged with `dirty_systems` when some of their mapped systems may have
+been removed from inventory. The reconciler reads flagged baselines, checks their
+mapped systems against inventory, removes the systems inventory no longer knows
+about and clears the flag. Inventory only returns the hosts an identity may read, so
+systems are only removed for tenants in which RBAC lets the reconciler's identity
+read every host. It runs outside of the request path, as a flask command:
+
+    FLASK_APP=system_baseline.app:get_flask_app_with_migration flask reconcile-dirty-baselines
+
+The mapped system counts are maintained by database triggers. Should they ever
+drift, they are repaired by recounting:
+
+    FLASK_APP=system_baseline.app:get_flask_app_with_migration flask reconcile-mapped-system-counts
+"""
+
+import base64
+import json
+
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from types import SimpleNamespace
+
+import click
+
+from flask import current_app
+from flask.cli import with_appcontext
+from kerlescan import config, view_helpers
+from kerlescan.exceptions import ItemNotReturned
+from kerlescan.inventory_service_interface import fetch_systems_with_profiles
+from sqlalchemy import tuple_, update
+
+from system_baseline import app_config, metrics
+from system_baseline.exceptions import RestrictedInventoryAccess
+from system_baseline.global_helpers import INVENTORY_READ_PERMISSIONS
+from system_baseline.models import SystemBaseline, SystemBaselineMappedSystem, db
+from system_baseline.views.v1 import get_event_counters
+
+
+def read_dirty_baselines(batch_size, skipped_ids=()):
+    """
+    return up to `batch_size` (id, account, org_id, modified_on) rows of baselines
+    flagged with dirty systems, ordered by tenant, leaving out `skipped_ids`
+    """
+    query = db.session.query(
+        SystemBaseline.id,
+        SystemBaseline.account,
+        SystemBaseline.org_id,
+        SystemBaseline.modified_on,
+    ).filter(SystemBaseline.dirty_systems.is_(True))
+    if skipped_ids:
+        query = query.filter(SystemBaseline.id.notin_(skipped_ids))
+    return query.order_by(SystemBaseline.org_id, SystemBaseline.account).limit(batch_size).all()
+
+
+def reconcile_dirty_baselines(logger, batch_size=None):
+    """
+    reconcile baselines flagged with dirty systems until none are left, committing
+    once per batch. Returns the number of baselines reconciled.
+
+    Inventory is called without a transaction open, so no rows are locked while it
+    is waited on, and only once RBAC was found to let the reconciler read every host
+    of the tenant. The mapped systems it no longer returns are then removed, and the
+    flags cleared, with one savepoint per tenant. A flag is only cleared if the
+    baseline was not modified since it was read. The baselines of a tenant that
+    fails stay flagged and are skipped for the rest of the run, so that one tenant
+    cannot block the others.
+    """
+    if batch_size is None:
+        batch_size = app_config.reconciler_batch_size
+
+    reconciled_count = 0
+    failed_tenants = set()
+    skipped_ids = set()
+    while True:
+        baselines = read_dirty_baselines(batch_size, skipped_ids)
+        tenants = [
+            (tenant, list(tenant_baselines))
+            for tenant, tenant_baselines in groupby(
+                baselines, key=lambda baseline: (baseline.account, baseline.org_id)
+            )
+        ]
+        tenant_system_ids = {
+            tenant: _read_mapped_system_ids(tenant_baselines, *tenant)
+            for tenant, tenant_baselines in tenants
+            if tenant not in failed_tenants
+        }
+        db.session.commit()
+        if not baselines:
+            break
+
+        # inventory is called before any row is written, while no transaction is open
+        tenant_missing_system_ids = {}
+        for tenant, tenant_baselines in tenants:
+            if tenant in failed_tenants:
+                continue
+            try:
+                auth_key = _tenant_identity(*tenant)
+                ensure_reads_every_host(auth_key, logger)
+                tenant_missing_system_ids[tenant] = fetch_missing_system_ids(
+                    tenant_system_ids[tenant], auth_key, logger
+                )
+            except RestrictedInventoryAccess as error:
+                account_number, org_id = tenant
+                logger.error(
+                    "Not reconciling baselines with dirty systems for org_id %s, account %s: %s"
+                    % (org_id, account_number, error.message)
+                )
+                failed_tenants.add(tenant)
+            except Exception:
+                _log_tenant_failure(logger, tenant)
+                failed_tenants.add(tenant)
+
+        for tenant, tenant_baselines in tenants:
+            if tenant not in failed_tenants:
+                try:
+                    with db.session.begin_nested():
+                        cleared_ids = _remove_systems_and_clear_flags(
+                            tenant_baselines, tenant_missing_system_ids[tenant], *tenant, logger
+                        )
+                    reconciled_count += len(cleared_ids)
+                    # baselines modified since they were read stay flagged for the next run
+                    skipped_ids.update(
+                        baseline.id
+                        for baseline in tenant_baselines
+                        if baseline.id not in cleared_ids
+                    )
+                    continue
+                except Exception:
+                    _log_tenant_failure(logger, tenant)
+                    failed_tenants.add(tenant)
+            skipped_ids.update(baseline.id for baseline in tenant_baselines)
+
+        db.session.commit()
+        logger.info("reconciled %s baselines with dirty systems" % reconciled_count)
+
+    return reconciled_count
+
+
+def _log_tenant_failure(logger, tenant):
+    account_number, org_id = tenant
+    logger.exception(
+        "Unknown error when reconciling baselines with dirty systems for org_id %s, account %s"
+        % (org_id, account_number)
+    )
+
+
+def _tenant_filter(model, account_number, org_id):
+    return model.org_id == org_id if org_id else model.account == account_number
+
+
+def _read_mapped_system_ids(baselines, account_number, org_id):
+    """
+    return the IDs of the systems mapped to any of `baselines`, which all belong to
+    the same tenant
+    """
+    # a system can be mapped to several baselines, only look it up once
+    return [
+        str(system_id)
+        for (system_id,) in db.session.query(SystemBaselineMappedSystem.system_id)
+        .filter(
+            _tenant_filter(SystemBaselineMappedSystem, account_number, org_id),
+            SystemBaselineMappedSystem.system_baseline_id.in_(
+                [baseline.id for baseline in baselines]
+            ),
+        )
+        .distinct()
+    ]
+
+
+def _remove_systems_and_clear_flags(baselines, missing_system_ids, account_number, org_id, logger):
+    """
+    remove the systems no longer in inventory from the tenant's baselines and clear
+    the flag of those of `baselines` that were not modified since they were read.
+    Returns the IDs of the baselines whose flag was cleared.
+    """
+    if missing_system_ids:
+        # not in inventory => delete in our db
+        SystemBaselineMappedSystem.query.filter(
+            _tenant_filter(SystemBaselineMappedSystem, account_number, org_id),
+            SystemBaselineMappedSystem.system_id.in_(missing_system_ids),
+        ).delete(synchronize_session=False)
+        logger.info(
+            "removed %s systems no longer in inventory for org_id %s"
+            % (len(missing_system_ids), org_id)
+        )
+
+    cleared = db.session.execute(
+        update(SystemBaseline)
+        .where(
+            tuple_(SystemBaseline.id, SystemBaseline.modified_on).in_(
+                [(baseline.id, baseline.modified_on) for baseline in baselines]
+            )
+        )
+        .values(dirty_systems=False)
+        .returning(SystemBaseline.id)
+        .execution_options(synchronize_session=False)
+    )
+    return {baseline_id for (baseline_id,) in cleared}
+
+
+def fetch_missing_system_ids(system_ids, auth_key, logger):
+    """
+    return the system IDs that are no longer available in inventory.
+
+    IDs are looked up in batches which run concurrently. A batch with missing
+    systems is split in half until the missing systems are isolated, so only
+    a few extra lookups are made per missing system.
+    """
+
+    def _missing_in_batch(batch):
+        try:
+            fetch_systems_with_profiles(batch, auth_key, logger, get_event_counters())
+        except ItemNotReturned:
+            if len(batch) == 1:
+                return batch
+            middle = len(batch) // 2
+            return _missing_in_batch(batch[:middle]) + _missing_in_batch(batch[middle:])
+        return []
+
+    batch_size = app_config.inventory_batch_size
+    batches = []
+    remaining = list(system_ids)
+    while remaining:
+        batches.append(remaining[:batch_size])
+        remaining = remaining[batch_size:]
+    if not batches:
+        return []
+
+    with ThreadPoolExecutor(
+        max_workers=min(app_config.inventory_max_workers, len(batches))
+    ) as executor:
+        results = executor.map(_missing_in_batch, batches)
+
+    return [system_id for missing in results for system_id in missing]
+
+
+def ensure_reads_every_host(auth_key, logger):
+    """
+    raise RestrictedInventoryAccess unless RBAC lets the identity in `auth_key` read
+    every host of its tenant. Hosts of the groups an identity may not read are left
+    out by inventory as if they were deleted. RBAC is checked by kerlescan, as for
+    requests; a denial is raised as its HTTPError.
+    """
+    rbac_filters = {}
+    view_helpers.ensure_has_permission(
+        permissions=INVENTORY_READ_PERMISSIONS,
+        application="inventory",
+        app_name=app_config.get_app_name(),
+        # kerlescan skips the check for the paths of the management API
+        request=SimpleNamespace(
+            path="/%s/%s/v1/baselines"
+            % (config.path_prefix.strip("/"), app_config.get_app_name().strip("/")),
+            method="GET",
+            url=None,
+            headers={"x-rh-identity": auth_key},
+            remote_addr=None,
+        ),
+        logger=logger,
+        request_metric=metrics.rbac_requests,
+        exception_metric=metrics.rbac_exceptions,
+        rbac_filters=rbac_filters,
+    )
+    if "group.id" in rbac_filters:
+        raise RestrictedInventoryAccess(
+            "the reconciler can only read the hosts of some groups, grant it"
+            " inventory:hosts:read on all hosts"
+        )
+
+
+def _tenant_identity(account_number, org_id):
+    """
+    build the identity header value used for inventory calls made on behalf of a
+    tenant, since there is no user request to take it from. The calls are made as
+    the reconciler's service account, see app_config.
+    """
+    identity = {
+        "identity": {
+            "account_number": account_number,
+            "org_id": org_id,
+            "internal": {"org_id": org_id},
+            "type": "ServiceAccount",
+            "auth_type": "jwt-auth",
+            "service_account": {
+                "client_id": app_config.reconciler_service_account_client_id,
+                "username": app_config.reconciler_service_account_username,
+            },
+        }
+    }
+    return base64.b64encode(json.dumps(identity).encode("utf-8")).decode("utf-8")
+
+
+@click.command("reconcile-dirty-baselines")
+@click.option("--batch-size", type=int, default=None, help="baselines read per batch")
+@with_appcontext
+def reconcile_dirty_baselines_command(batch_size):
+    """
+    reconcile baselines flagged with dirty systems against inventory
+    """
+    reconciled_count = reconcile_dirty_baselines(current_app.logger, batch_size=batch_size)
+    click.echo("reconciled %s baselines with dirty systems" % reconciled_count)
+
+
+@click.command("reconcile-mapped-system-counts")
+@with_appcontext
+def reconcile_mapped_system_counts_command():
+    """
+    recount the mapped systems of baselines and repair the counts that drifted
+    """
+    repaired_baseline_ids = SystemBaseline.reconcile_mapped_system_counts()
+    db.session.commit()
+    for baseline_id in repaired_baseline_ids:
+        current_app.logger.info("repaired mapped system count of baseline %s" % baseline_id)
+    click.echo("repaired mapped system counts of %s baselines" % len(repaired_baseline_ids))
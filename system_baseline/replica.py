@@ -0,0 +1,133 @@
+"""
+Routing of reads to the read replica.
+
+Functions that only read are decorated with `reads_from_replica`. The transactions
+they begin are READ ONLY, until the session is removed with the app context. While
+they run, the statements of the session go to the replica when one is configured
+with BASELINE_DB_REPLICA_HOST and its replay lag is at most BASELINE_DB_REPLICA_MAX_LAG
+seconds; otherwise, and for flushes and INSERT/UPDATE/DELETE statements, they go to
+the primary. The lag is checked in the background, see replica_status.
+
+Functions that must read a consistent view of several statements, such as a page and
+its counts, are decorated with `reads_snapshot_from_replica` instead. The transaction
+they begin is REPEATABLE READ as well as READ ONLY, so that all of its statements read
+the same snapshot of the database. It has to be begun by the function, by its first
+statement.
+"""
+
+import functools
+
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context
+from sqlalchemy.sql import text
+
+from system_baseline import db_config
+from system_baseline.periodic import PeriodicRefresh
+
+
+REPLICA_BIND_KEY = "replica"
+
+# seconds the replica is behind the primary; 0 when it has replayed all it received
+REPLICA_LAG = text(
+    "select case when pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() then 0"
+    " else extract(epoch from now() - pg_last_xact_replay_timestamp()) end"
+)
+
+
+def get_engine_binds():
+    """
+    return the Flask-SQLAlchemy binds for the configured replica
+    """
+    if not db_config.db_replica_uri:
+        return {}
+    return {
+        REPLICA_BIND_KEY: {
+            "url": db_config.db_replica_uri,
+            "pool_size": db_config.db_pool_size,
+            "pool_timeout": db_config.db_pool_timeout,
+        }
+    }
+
+
+def _replica_is_current():
+    try:
+        engine = current_app.extensions["sqlalchemy"].engines[REPLICA_BIND_KEY]
+        with engine.connect() as connection:
+            lag = connection.execute(REPLICA_LAG).scalar()
+    except Exception:
+        current_app.logger.exception("Unknown error when checking the replica lag")
+        return False
+
+    # no lag at all means the replica is not replaying from a primary
+    if lag is None or lag > db_config.db_replica_max_lag:
+        current_app.logger.warning("replica lag is %s, reading from the primary" % lag)
+        return False
+    return True
+
+
+replica_status = PeriodicRefresh(
+    "replica-lag-check", _replica_is_current, db_config.db_replica_lag_check_interval
+)
+
+
+def is_read_only():
+    """
+    whether the current app context is in a `reads_from_replica` function
+    """
+    return has_app_context() and g.get("replica_reads", False)
+
+
+def is_snapshot():
+    """
+    whether the current app context is in a `reads_snapshot_from_replica` function
+    """
+    return has_app_context() and g.get("snapshot_reads", False)
+
+
+def use_replica():
+    """
+    whether reads of the current app context go to the replica
+    """
+    if not is_read_only() or not db_config.db_replica_uri:
+        return False
+    return replica_status.get(current_app._get_current_object())
+
+
+@contextmanager
+def replica_reads():
+    previous = g.get("replica_reads", False)
+    g.replica_reads = True
+    try:
+        yield
+    finally:
+        g.replica_reads = previous
+
+
+def reads_from_replica(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with replica_reads():
+            return function(*args, **kwargs)
+
+    return wrapper
+
+
+@contextmanager
+def snapshot_reads():
+    previous = g.get("snapshot_reads", False)
+    g.snapshot_reads = True
+    try:
+        with replica_reads():
+            yield
+    finally:
+        g.snapshot_reads = previous
+
+
+def reads_snapshot_from_replica(function):
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with snapshot_reads():
+            return function(*args, **kwargs)
+
+    return wrapper
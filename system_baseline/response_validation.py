@@ -0,0 +1,73 @@
+"""
+Response validation against the API specification, in one of three modes set
+with RESPONSE_VALIDATION:
+
+    full     every response is validated and non-conforming responses fail. Each
+             body is held in memory until it is validated, streamed ones included,
+             so this is for tests and CI only. This is the default.
+    sampled  RESPONSE_VALIDATION_SAMPLE_RATE of the responses are validated, and
+             non-conforming responses are counted but still sent. Streamed
+             responses, which have no Content-Length, are not validated.
+    off      responses are not validated.
+"""
+
+import random
+
+from connexion.datastructures import MediaTypeDict
+from connexion.exceptions import NonConformingResponseBody
+from connexion.validators import VALIDATOR_MAP, JSONResponseBodyValidator
+
+from system_baseline import app_config, metrics
+
+
+class SampledJSONResponseBodyValidator(JSONResponseBodyValidator):
+    def wrap_send(self, send):
+        if (
+            app_config.response_validation == "sampled"
+            and random.random() >= app_config.response_validation_sample_rate
+        ):
+            return send
+        validating_send = super(SampledJSONResponseBodyValidator, self).wrap_send(send)
+        if app_config.response_validation == "full":
+            return validating_send
+
+        # the validator holds the whole body, which streamed responses avoid building
+        target = validating_send
+
+        async def send_(message):
+            nonlocal target
+            if message["type"] == "http.response.start" and not _has_content_length(message):
+                target = send
+            await target(message)
+
+        return send_
+
+    def _validate(self, body):
+        try:
+            return super(SampledJSONResponseBodyValidator, self)._validate(body)
+        except NonConformingResponseBody:
+            metrics.response_validation_violations.inc()
+            if app_config.response_validation == "full":
+                raise
+
+
+def _has_content_length(message):
+    return any(name.lower() == b"content-length" for name, _ in message.get("headers", []))
+
+
+def validate_responses():
+    """
+    return true if responses are to be validated at all
+    """
+    return app_config.response_validation != "off"
+
+
+def get_validator_map():
+    """
+    return the connexion validator map, with JSON responses validated as configured
+    """
+    return {
+        "response": MediaTypeDict(
+            {**VALIDATOR_MAP["response"], "*/*json": SampledJSONResponseBodyValidator}
+        )
+    }
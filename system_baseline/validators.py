@@ -1,6 +1,9 @@
+import json
+
 from system_baseline.exceptions import FactValidationError
 
 
+# the one limit on the size of a baseline's facts, as encoded JSON
 FACTS_MAXSIZE = 2**20  # 1 MB
 
 
@@ -8,63 +11,105 @@ def check_for_duplicate_names(facts):
     """
     check if any names are duplicated; raises an exception if duplicates are found.
     """
-    names = []
-    categories = []
-    for fact in facts:
+    violations = find_fact_violations(facts, fact_checks=())
+    if violations:
+        raise FactValidationError(violations[0][1], violations=violations)
+
+
+def validate_facts(facts):
+    """
+    run every fact validation in a single pass over the fact tree; raises an exception
+    listing all violations found, each prefixed with the JSON pointer of the fact.
+    """
+    violations = find_fact_violations(facts)
+    if violations:
+        message = "; ".join("%s (at %s)" % (message, path) for path, message in violations)
+        raise FactValidationError(message, violations=violations)
+
+
+def find_fact_violations(facts, fact_checks=None, path=""):
+    """
+    walk the fact tree once and return a list of (JSON pointer, message) tuples, one
+    per violation. Names and categories are checked for duplicates on each level,
+    and every fact is passed to each of `fact_checks`, which return an error message
+    or None.
+    """
+    if fact_checks is None:
+        fact_checks = FACT_CHECKS
+
+    violations = []
+    names = set()
+    categories = set()
+    for index, fact in enumerate(facts):
+        fact_path = "%s/%s" % (path, index)
+
+        for fact_check in fact_checks:
+            message = fact_check(fact)
+            if message:
+                violations.append((fact_path, message))
+
         if "values" in fact:
-            categories.append(fact["name"])
-            check_for_duplicate_names(fact["values"])
+            if fact["name"] in categories:
+                violations.append((fact_path, "A category with this name already exists."))
+            categories.add(fact["name"])
+            violations.extend(
+                find_fact_violations(fact["values"], fact_checks, path=fact_path + "/values")
+            )
         else:
-            names.append(fact["name"])
+            if fact["name"] in names:
+                violations.append((fact_path, "A fact with this name already exists."))
+            names.add(fact["name"])
 
-    for name in names:
-        if names.count(name) > 1:
-            raise FactValidationError("A fact with this name already exists.")
+    return violations
 
-    for category in categories:
-        if categories.count(category) > 1:
-            raise FactValidationError("A category with this name already exists.")
 
+def _check_value_values(fact):
+    """
+    check if the fact has "value" and "values" both defined
+    """
+    if "values" in fact and "value" in fact:
+        return "fact %s cannot have value and values defined" % fact["name"]
 
-def check_for_value_values(facts):
+
+def _check_empty_name_value(fact):
     """
-    check if any fields have "value" and "values" both defined
+    check if the fact name or value is empty
     """
-    for fact in facts:
-        if "values" in fact and "value" in fact:
-            raise FactValidationError("fact %s cannot have value and values defined" % fact["name"])
-        elif "values" in fact:
-            check_for_value_values(fact["values"])
+    if "name" in fact and not fact["name"]:
+        return "fact name cannot be empty"
+    elif "value" in fact and not fact["value"]:
+        return "value for %s cannot be empty" % fact["name"]
 
 
-def check_for_empty_name_values(facts):
+def _check_invalid_whitespace_name_value(fact):
     """
-    check if any name values are empty; raises an exception if found.
+    check if the fact name or value has leading or trailing whitespace
     """
-    for fact in facts:
-        if "values" in fact:
-            check_for_empty_name_values(fact["values"])
-        if "name" in fact and not fact["name"]:
-            raise FactValidationError("fact name cannot be empty")
-        elif "value" in fact and not fact["value"]:
-            raise FactValidationError("value for %s cannot be empty" % fact["name"])
+    if "name" in fact and not check_whitespace(fact["name"]):
+        return "Fact name cannot have leading or trailing whitespace."
+    elif "value" in fact and not isinstance(fact["value"], list):
+        if not check_whitespace(fact["value"]):
+            return "Value for %s cannot have leading or trailing whitespace." % fact["name"]
 
 
-def check_for_invalid_whitespace_name_values(facts):
+def _check_name_value_length(fact):
     """
-    check if any name or values have invalid whitespace at beginning and end; raises an exception.
+    check the following lengths:
+        * name is over 500 char
+        * value is over 1000 char
     """
-    for fact in facts:
-        if "values" in fact:
-            check_for_invalid_whitespace_name_values(fact["values"])
-        if "name" in fact and not check_whitespace(fact["name"]):
-            raise FactValidationError("Fact name cannot have leading or trailing whitespace.")
-        elif "value" in fact:
-            if not isinstance(fact["value"], list):
-                if not check_whitespace(fact["value"]):
-                    raise FactValidationError(
-                        "Value for %s cannot have leading or trailing whitespace." % fact["name"]
-                    )
+    if "name" in fact and len(fact["name"]) > 500:
+        return "fact name %s is over 500 characters" % fact["name"]
+    elif "value" in fact and len(fact["value"]) > 1000:
+        return "value %s is over 1000 characters" % fact["value"]
+
+
+FACT_CHECKS = (
+    _check_empty_name_value,
+    _check_invalid_whitespace_name_value,
+    _check_value_values,
+    _check_name_value_length,
+)
 
 
 def check_whitespace(input_string):
@@ -78,22 +123,22 @@ def check_whitespace(input_string):
 
 def check_facts_length(facts):
     """
-    check if fact length is greater than FACTS_MAXSIZE
+    check if the facts encoded as JSON are larger than FACTS_MAXSIZE bytes
     """
-    if len(str(facts)) > FACTS_MAXSIZE:
+    if facts_size_exceeds(facts, FACTS_MAXSIZE):
         raise FactValidationError("attempted to save fact list over %s bytes" % FACTS_MAXSIZE)
 
 
-def check_name_value_length(facts):
+def facts_size_exceeds(facts, limit):
     """
-    check the following lengths:
-        * name is over 500 char
-        * value is over 1000 char
+    return true if the UTF-8 encoded JSON of `facts` is over `limit` bytes. The JSON is
+    encoded by the C encoder of json.dumps, and only encoded to UTF-8 to be measured when
+    the character count, which is between a quarter of the byte count and the byte
+    count, does not settle it.
     """
-    for fact in facts:
-        if "values" in fact:
-            check_name_value_length(fact["values"])
-        if "name" in fact and len(fact["name"]) > 500:
-            raise FactValidationError("fact name %s is over 500 characters" % fact["name"])
-        elif "value" in fact and len(fact["value"]) > 1000:
-            raise FactValidationError("value %s is over 1000 characters" % fact["value"])
+    text = json.dumps(facts, ensure_ascii=False)
+    if len(text) > limit:
+        return True
+    if len(text) * 4 <= limit or text.isascii():
+        return False
+    return len(text.encode("utf-8")) > limit
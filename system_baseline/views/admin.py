@@ -1,120 +1,118 @@
 from calendar import monthrange
 from datetime import date, timedelta
 
-from flask import Blueprint, jsonify
-from sqlalchemy import func
+from flask import Blueprint, current_app, jsonify
+from sqlalchemy import func, select
 
-from system_baseline.models import SystemBaseline, SystemBaselineMappedSystem
+from system_baseline import app_config
+from system_baseline.models import SystemBaseline, SystemBaselineMappedSystem, db
+from system_baseline.periodic import PeriodicRefresh
+from system_baseline.replica import reads_from_replica
 from system_baseline.version import app_version
 
 
 section = Blueprint("internal_admin", __name__)
 
-
-def status():
+# bucket name => (lowest, highest) count in the bucket
+BUCKETS = {
+    "1": (1, 1),
+    "2": (2, 2),
+    "3": (3, 3),
+    "4": (4, 4),
+    "5-10": (5, 10),
+    "10+": (11, None),
+}
+
+
+def _bucket_counts(count_column):
+    """
+    return one aggregate per bucket, counting the rows whose `count_column` falls in it
+    """
+    bucket_counts = []
+    for bucket, (low, high) in BUCKETS.items():
+        in_bucket = count_column >= low if high is None else count_column.between(low, high)
+        bucket_counts.append(func.count().filter(in_bucket).label(bucket))
+    return bucket_counts
+
+
+@reads_from_replica
+def build_status_report():
+    """
+    build the status report with one query per table
+    """
     dt = date.today()
 
-    total_baselines = SystemBaseline.query.with_entities(SystemBaseline.id).distinct().count()
-    customer_count = SystemBaseline.query.with_entities(SystemBaseline.org_id).distinct().count()
-
-    created_baselines_today = SystemBaseline.query.filter(
-        func.date(SystemBaseline.created_on) == dt
-    ).count()
-
-    created_baselines_week = SystemBaseline.query.filter(
-        SystemBaseline.created_on.between(dt - timedelta(days=dt.weekday()), dt + timedelta(days=6))
-    ).count()
-
-    created_baselines_month = SystemBaseline.query.filter(
-        SystemBaseline.created_on.between(
-            dt.replace(day=1), dt.replace(day=monthrange(dt.year, dt.month)[1])
-        )
-    ).count()
-
-    baseline_bucket_counts = {}
-
-    for i in range(1, 5):
-        baseline_bucket_counts[i] = (
-            SystemBaseline.query.with_entities(SystemBaseline.org_id)
-            .group_by(SystemBaseline.org_id)
-            .having(func.count() == i)
-        ).count()
-
-    baseline_bucket_counts[5] = (
-        SystemBaseline.query.with_entities(SystemBaseline.org_id)
-        .group_by(SystemBaseline.org_id)
-        .having(func.count() >= 5)
-        .having(func.count() <= 10)
-    ).count()
-
-    baseline_bucket_counts[11] = (
-        SystemBaseline.query.with_entities(SystemBaseline.org_id)
-        .group_by(SystemBaseline.org_id)
-        .having(func.count() > 10)
-    ).count()
-
-    baselines_with_associations = (
-        (
-            SystemBaselineMappedSystem.query.with_entities(
-                SystemBaselineMappedSystem.system_baseline_id
+    baselines_per_customer = (
+        select(
+            func.count().label("baseline_count"),
+            func.count().filter(func.date(SystemBaseline.created_on) == dt).label("created_today"),
+            func.count()
+            .filter(
+                SystemBaseline.created_on.between(
+                    dt - timedelta(days=dt.weekday()), dt + timedelta(days=6)
+                )
+            )
+            .label("created_week"),
+            func.count()
+            .filter(
+                SystemBaseline.created_on.between(
+                    dt.replace(day=1), dt.replace(day=monthrange(dt.year, dt.month)[1])
+                )
             )
+            .label("created_month"),
         )
-        .distinct()
-        .count()
+        .select_from(SystemBaseline)
+        .group_by(SystemBaseline.org_id)
+        .subquery()
     )
-
-    baseline_associations_bucket_counts = {}
-
-    for i in range(1, 5):
-        baseline_associations_bucket_counts[i] = (
-            SystemBaselineMappedSystem.query.with_entities(
-                SystemBaselineMappedSystem.system_baseline_id
-            )
-            .group_by(SystemBaselineMappedSystem.system_baseline_id)
-            .having(func.count() == i)
-        ).count()
-
-    baseline_associations_bucket_counts[5] = (
-        SystemBaselineMappedSystem.query.with_entities(
-            SystemBaselineMappedSystem.system_baseline_id
+    baselines = db.session.execute(
+        select(
+            func.coalesce(func.sum(baselines_per_customer.c.baseline_count), 0).label("total"),
+            func.count().label("customer_count"),
+            func.coalesce(func.sum(baselines_per_customer.c.created_today), 0).label(
+                "created_today"
+            ),
+            func.coalesce(func.sum(baselines_per_customer.c.created_week), 0).label("created_week"),
+            func.coalesce(func.sum(baselines_per_customer.c.created_month), 0).label(
+                "created_month"
+            ),
+            *_bucket_counts(baselines_per_customer.c.baseline_count),
         )
-        .group_by(SystemBaselineMappedSystem.system_baseline_id)
-        .having(func.count() >= 5)
-        .having(func.count() <= 10)
-    ).count()
+    ).one()
 
-    baseline_associations_bucket_counts[11] = (
-        SystemBaselineMappedSystem.query.with_entities(
-            SystemBaselineMappedSystem.system_baseline_id
-        )
+    associations_per_baseline = (
+        select(func.count().label("association_count"))
+        .select_from(SystemBaselineMappedSystem)
         .group_by(SystemBaselineMappedSystem.system_baseline_id)
-        .having(func.count() > 10)
-    ).count()
+        .subquery()
+    )
+    associations = db.session.execute(
+        select(
+            func.count().label("total"),
+            *_bucket_counts(associations_per_baseline.c.association_count),
+        )
+    ).one()
 
-    result = {
+    # sums of counts come back as numeric
+    return {
         "system_baseline_version": app_version,
-        "totalBaselinesCount": total_baselines,
-        "customerIdsCount": customer_count,
-        "BaselinesBuckets": {
-            "1": baseline_bucket_counts[1],
-            "2": baseline_bucket_counts[2],
-            "3": baseline_bucket_counts[3],
-            "4": baseline_bucket_counts[4],
-            "5-10": baseline_bucket_counts[5],
-            "10+": baseline_bucket_counts[11],
-        },
-        "createdBaselinesToday": created_baselines_today,
-        "createdBaselinesWeek": created_baselines_week,
-        "createdBaselinesMonth": created_baselines_month,
-        "totalBaselinesWithAssociationsCount": baselines_with_associations,
+        "totalBaselinesCount": int(baselines.total),
+        "customerIdsCount": baselines.customer_count,
+        "BaselinesBuckets": {bucket: baselines._mapping[bucket] for bucket in BUCKETS},
+        "createdBaselinesToday": int(baselines.created_today),
+        "createdBaselinesWeek": int(baselines.created_week),
+        "createdBaselinesMonth": int(baselines.created_month),
+        "totalBaselinesWithAssociationsCount": associations.total,
         "BaselinesAssociationsBuckets": {
-            "1": baseline_associations_bucket_counts[1],
-            "2": baseline_associations_bucket_counts[2],
-            "3": baseline_associations_bucket_counts[3],
-            "4": baseline_associations_bucket_counts[4],
-            "5-10": baseline_associations_bucket_counts[5],
-            "10+": baseline_associations_bucket_counts[11],
+            bucket: associations._mapping[bucket] for bucket in BUCKETS
         },
     }
 
-    return jsonify(result)
+
+status_report = PeriodicRefresh(
+    "admin-status-report", build_status_report, app_config.admin_status_refresh_interval
+)
+
+
+def status():
+    return jsonify(status_report.get(current_app._get_current_object()))
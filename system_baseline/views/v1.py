@@ -1,14 +1,20 @@
+import base64
+import hashlib
+import json
+import uuid
+
+from datetime import datetime
 from http import HTTPStatus
+from urllib.parse import urlencode
 
-from flask import Blueprint, current_app, g, request
+from flask import Blueprint, Response, current_app, g, request, stream_with_context
 from kerlescan import profile_parser, view_helpers
-from kerlescan.exceptions import HTTPError, ItemNotReturned
-from kerlescan.inventory_service_interface import fetch_systems_with_profiles
+from kerlescan.exceptions import HTTPError
 from kerlescan.paginate import build_paginated_baseline_list_response
-from kerlescan.service_interface import get_key_from_headers
 from kerlescan.view_helpers import validate_uuids
-from sqlalchemy import func
-from sqlalchemy.orm.session import make_transient
+from sqlalchemy import Text, cast, func, tuple_
+from sqlalchemy.orm import defer
+from werkzeug.http import quote_etag
 
 from system_baseline import metrics, validators
 from system_baseline.global_helpers import (
@@ -18,13 +24,19 @@ from system_baseline.global_helpers import (
     ensure_rbac_notifications_read,
     ensure_rbac_notifications_write,
 )
-from system_baseline.models import SystemBaseline, SystemBaselineMappedSystem, db
+from system_baseline.json_cache import baseline_json_cache
+from system_baseline.models import SystemBaseline, db
+from system_baseline.replica import reads_from_replica, reads_snapshot_from_replica
 from system_baseline.version import app_version
 
 
 section = Blueprint("v1", __name__)
 
-FACTS_MAXSIZE = 2**19  # 512KB
+ORDER_BY_COLUMNS = {
+    "display_name": SystemBaseline.display_name,
+    "created_on": SystemBaseline.created_on,
+    "updated": SystemBaseline.modified_on,
+}
 
 
 def _get_total_available_baselines():
@@ -56,6 +68,7 @@ def get_version():
 
 @metrics.baseline_fetch_requests.time()
 @metrics.api_exceptions.count_exceptions()
+@reads_snapshot_from_replica
 def get_baselines_by_ids(baseline_ids, limit, offset, order_by, order_how):
     """
     return a list of baselines given their ID
@@ -69,69 +82,158 @@ def get_baselines_by_ids(baseline_ids, limit, offset, order_by, order_how):
 
     account_number = view_helpers.get_account_number(request)
     org_id = view_helpers.get_org_id(request)
+    tenant_filter = (
+        SystemBaseline.org_id == org_id if org_id else SystemBaseline.account == account_number
+    )
+    filters = [tenant_filter, SystemBaseline.id.in_(baseline_ids)]
+
+    # the page, without its facts, and the counts are read with a single statement.
+    # The requested IDs are only read separately if some are missing.
+    query = SystemBaseline.get_page_query(
+        tenant_filter,
+        filters,
+        rbac_group_filters=g.get("rbac_filters").get("group.id", None),
+    )
+    query = _create_ordering(order_by, order_how, query)
 
-    if org_id:
-        query = SystemBaseline.query.filter(
-            SystemBaseline.org_id == org_id, SystemBaseline.id.in_(baseline_ids)
-        )
-    else:
-        query = SystemBaseline.query.filter(
-            SystemBaseline.account == account_number, SystemBaseline.id.in_(baseline_ids)
-        )
-
-    full_results = query.all()
+    # the facts are only read for baselines that are not in baseline_json_cache, see
+    # _get_baseline_facts
+    query = query.options(defer(SystemBaseline.baseline_facts)).limit(limit).offset(offset)
 
-    # DRFT-830
-    # temporarily check
-    # is systems are being present in inventory
-    check_dirty_baselines(full_results)
+    # the page, the counts and the facts are all read from the same snapshot, so that
+    # the body and the ETag are of the same rows
+    page_results = query.all()
 
     message = "read baselines"
     current_app.logger.audit(message, request=request)
 
-    if len(full_results) < len(baseline_ids):
-        fetched_ids = {str(result.id) for result in full_results}
+    if page_results and page_results[0].count == len(baseline_ids):
+        count = page_results[0].count
+        total_available = page_results[0].total_available
+    else:
+        fetched_ids = {
+            str(baseline_id)
+            for (baseline_id,) in db.session.query(SystemBaseline.id).filter(*filters)
+        }
         missing_ids = set(baseline_ids) - fetched_ids
+        if missing_ids:
+            message = "ids [%s] not available to display" % ", ".join(missing_ids)
+            current_app.logger.audit(message, request=request, success=False)
+            raise HTTPError(
+                HTTPStatus.NOT_FOUND,
+                message=message,
+            )
+
+        # the offset is past the last row
+        count = len(fetched_ids)
+        total_available = _get_total_available_baselines()
 
-        message = "ids [%s] not available to display" % ", ".join(missing_ids)
-        current_app.logger.audit(message, request=request, success=False)
-        raise HTTPError(
-            HTTPStatus.NOT_FOUND,
-            message=message,
+    message = "counted baselines"
+    current_app.logger.audit(message, request=request)
+
+    etag = _get_page_etag(page_results, count, total_available)
+    not_modified = _not_modified(etag)
+    if not_modified is not None:
+        return not_modified
+
+    page = build_paginated_baseline_list_response(
+        limit, offset, order_by, order_how, [], total_available, count
+    )
+    response = Response(
+        stream_with_context(
+            _stream_baselines_page(page, page_results, _get_baseline_facts(page_results))
+        ),
+        mimetype="application/json",
+    )
+    response.set_etag(etag)
+    return response
+
+
+def _get_page_etag(page_results, *page_state):
+    """
+    return the ETag of a page of baselines: a hash of what the page is built from,
+    which is the app version, the request URL, `page_state` such as the counts, and
+    each baseline on the page with its mapped system count. Facts are not hashed,
+    they are only written along with the modification time.
+    """
+    digest = hashlib.sha256()
+    for part in [app_version, request.full_path, *page_state]:
+        digest.update(("%s\n" % part).encode("utf-8"))
+    for result in page_results:
+        baseline_json = result.SystemBaseline.to_json(withhold_facts=True)
+        digest.update(
+            (
+                "%s %s\n" % (json.dumps(baseline_json, sort_keys=True), result.mapped_system_count)
+            ).encode("utf-8")
         )
+    return digest.hexdigest()
 
-    count = query.count()
 
-    message = "counted baselines"
+def _not_modified(etag, weak=False):
+    """
+    return a 304 response if the request's If-None-Match matches `etag`, or None
+    """
+    if not request.if_none_match.contains_weak(etag):
+        return None
+
+    message = "baselines not modified"
     current_app.logger.audit(message, request=request)
 
-    total_available = _get_total_available_baselines()
+    response = Response(status=HTTPStatus.NOT_MODIFIED)
+    response.set_etag(etag, weak=weak)
+    return response
 
-    query = _create_ordering(order_by, order_how, query)
-    query = query.limit(limit).offset(offset)
 
-    query_results = query.all()
+def _get_baseline_facts(page_results):
+    """
+    return the facts of the baselines on a page as JSON text, keyed by baseline id.
+    Facts not in baseline_json_cache are read as the JSON text postgres outputs for
+    them, which is copied without being decoded.
+    """
+    facts = {}
+    missing_ids = []
+    for result in page_results:
+        baseline = result.SystemBaseline
+        facts_text = baseline_json_cache.get((baseline.id, baseline.modified_on))
+        if facts_text is None:
+            missing_ids.append(baseline.id)
+        else:
+            facts[baseline.id] = facts_text
 
-    message = "read baselines"
-    current_app.logger.audit(message, request=request)
+    if missing_ids:
+        results = db.session.query(
+            SystemBaseline.id,
+            SystemBaseline.modified_on,
+            cast(SystemBaseline.baseline_facts, Text),
+        ).filter(SystemBaseline.id.in_(missing_ids))
+        for baseline_id, modified_on, facts_text in results:
+            facts_text = facts_text or "null"
+            baseline_json_cache.set((baseline_id, modified_on), facts_text)
+            facts[baseline_id] = facts_text
+
+    return facts
 
-    json_list = [baseline.to_json(withhold_facts=False) for baseline in query_results]
 
+def _stream_baselines_page(page, page_results, facts):
     """
-    mapped_systems_count is a list of baseline ids and their associated systems counts.
-    for loop adds mapped system count for each baseline in the list and sets to 0 if none
+    yield a page of baselines as JSON, one baseline at a time, with their `facts`
+    copied from JSON text
     """
-    mapped_systems_count = SystemBaselineMappedSystem.get_mapped_system_count(
-        account_number, org_id, rbac_group_filters=g.get("rbac_filters").get("group.id", None)
-    )
-    for baseline in json_list:
-        baseline["mapped_system_count"] = 0
-        for baseline_count in mapped_systems_count:
-            if baseline["id"] == str(baseline_count[0]):
-                baseline["mapped_system_count"] = baseline_count[1]
-    return build_paginated_baseline_list_response(
-        limit, offset, order_by, order_how, json_list, total_available, count
+    yield '{"meta": %s, "links": %s, "data": [' % (
+        json.dumps(page["meta"]),
+        json.dumps(page["links"]),
     )
+    separator = ""
+    for result in page_results:
+        baseline = result.SystemBaseline
+        yield '%s{"mapped_system_count": %d, %s, "baseline_facts": %s}' % (
+            separator,
+            result.mapped_system_count,
+            json.dumps(baseline.to_json(withhold_facts=True))[1:-1],
+            facts[baseline.id],
+        )
+        separator = ","
+    yield "]}"
 
 
 @metrics.baseline_delete_requests.time()
@@ -215,88 +317,150 @@ def _create_ordering(order_by, order_how, query):
     """
     helper method to set ordering on query. `order_by` and `order_how` are
     guaranteed to be populated as "DESC" or "ASC" via the openapi definition.
+    Baselines are also ordered by id, so that the ordering is total and pages
+    can be resumed from a cursor.
+    """
+    column = ORDER_BY_COLUMNS[order_by]
+    if order_how == "DESC":
+        return query.order_by(column.desc(), SystemBaseline.id.desc())
+    return query.order_by(column.asc(), SystemBaseline.id.asc())
+
+
+def _encode_cursor(order_by, order_how, baseline):
+    """
+    return an opaque cursor pointing after `baseline` in the given ordering
+    """
+    value = getattr(baseline, ORDER_BY_COLUMNS[order_by].key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    cursor = json.dumps([order_by, order_how, value, str(baseline.id)])
+    return base64.urlsafe_b64encode(cursor.encode("utf-8")).decode("ascii")
+
+
+def _get_keyset_filter(cursor, order_by, order_how):
+    """
+    return a filter for the baselines after `cursor` in the given ordering
+    """
+    try:
+        cursor_order_by, cursor_order_how, value, baseline_id = json.loads(
+            base64.urlsafe_b64decode(cursor.encode("ascii"))
+        )
+        if (cursor_order_by, cursor_order_how) != (order_by, order_how):
+            raise ValueError("cursor was created for another ordering")
+        if order_by != "display_name":
+            value = datetime.fromisoformat(value)
+        baseline_id = uuid.UUID(baseline_id)
+    except (ValueError, TypeError, AttributeError):
+        message = "invalid cursor"
+        current_app.logger.audit(message, request=request, success=False)
+        raise HTTPError(HTTPStatus.BAD_REQUEST, message=message)
+
+    keyset = tuple_(ORDER_BY_COLUMNS[order_by], SystemBaseline.id)
+    if order_how == "DESC":
+        return keyset < (value, baseline_id)
+    return keyset > (value, baseline_id)
+
+
+def get_display_name_filter(display_name, display_name_match):
+    """
+    return a filter for the display names that contain `display_name` or, with the
+    "prefix" `display_name_match`, start with it, ignoring case. Both match
+    lower(display_name), to use the display name search indexes of SystemBaseline.
     """
-    if order_by == "display_name":
-        if order_how == "DESC":
-            query = query.order_by(SystemBaseline.display_name.desc())
-        elif order_how == "ASC":
-            query = query.order_by(SystemBaseline.display_name.asc())
-    elif order_by == "created_on":
-        if order_how == "DESC":
-            query = query.order_by(SystemBaseline.created_on.desc())
-        elif order_how == "ASC":
-            query = query.order_by(SystemBaseline.created_on.asc())
-    elif order_by == "updated":
-        if order_how == "DESC":
-            query = query.order_by(SystemBaseline.modified_on.desc())
-        elif order_how == "ASC":
-            query = query.order_by(SystemBaseline.modified_on.asc())
-
-    return query
+    lower_display_name = func.lower(SystemBaseline.display_name)
+    if display_name_match == "prefix":
+        return lower_display_name.startswith(display_name.lower(), autoescape=True)
+    return lower_display_name.contains(display_name.lower(), autoescape=True)
 
 
 @metrics.baseline_fetch_all_requests.time()
 @metrics.api_exceptions.count_exceptions()
-def get_baselines(limit, offset, order_by, order_how, display_name=None):
+@reads_from_replica
+def get_baselines(
+    limit,
+    offset,
+    order_by,
+    order_how,
+    display_name=None,
+    display_name_match="contains",
+    cursor=None,
+):
     """
     return a list of baselines given their display_name
     if no display_names given, return a list of all baselines for this account
+
+    display names either contain the given display_name or, with the "prefix"
+    display_name_match, start with it
+
+    if a cursor from a previous page is given, the page starts right after it
+    and the offset is ignored
     """
     ensure_rbac_baselines_read()
     account_number = view_helpers.get_account_number(request)
     org_id = view_helpers.get_org_id(request)
-    if org_id:
-        query = SystemBaseline.query.filter(SystemBaseline.org_id == org_id)
-    else:
-        query = SystemBaseline.query.filter(SystemBaseline.account == account_number)
+    tenant_filter = (
+        SystemBaseline.org_id == org_id if org_id else SystemBaseline.account == account_number
+    )
+    filters = [tenant_filter]
 
     link_args_dict = {}
     if display_name:
         link_args_dict["display_name"] = display_name
-        query = query.filter(
-            func.lower(SystemBaseline.display_name).contains(display_name.lower(), autoescape=True)
-        )
-
-    count = query.count()
-
-    message = "counted baselines"
-    current_app.logger.audit(message, request=request)
-
-    total_available = _get_total_available_baselines()
-
-    message = "counted total available baselines"
-    current_app.logger.audit(message, request=request)
-
+        if display_name_match == "prefix":
+            link_args_dict["display_name_match"] = display_name_match
+        filters.append(get_display_name_filter(display_name, display_name_match))
+
+    # page rows, filtered count, total available and mapped system counts are
+    # all read with a single statement
+    keyset_filter = None
+    if cursor:
+        keyset_filter = _get_keyset_filter(cursor, order_by, order_how)
+        offset = 0
+
+    query = SystemBaseline.get_page_query(
+        tenant_filter,
+        filters,
+        rbac_group_filters=g.get("rbac_filters").get("group.id", None),
+        keyset_filter=keyset_filter,
+    )
+    # facts are withheld from the listing, fact_count is computed by the database
+    query = query.options(defer(SystemBaseline.baseline_facts))
     query = _create_ordering(order_by, order_how, query)
+    # one extra row tells whether there is a next page
+    query = query.limit(limit + 1).offset(offset)
 
-    query = query.limit(limit).offset(offset)
-
-    query_results = query.all()
+    page_results = query.all()
+    has_next_page = len(page_results) > limit
+    page_results = page_results[:limit]
 
     message = "read baselines"
     current_app.logger.audit(message, request=request)
 
-    json_list = [baseline.to_json(withhold_facts=True) for baseline in query_results]
+    if page_results:
+        count = page_results[0].count
+        total_available = page_results[0].total_available
+    else:
+        # the window count is not available when the offset is past the last
+        # row, so fall back to counting separately
+        count = SystemBaseline.query.filter(*filters).count()
+        total_available = _get_total_available_baselines()
 
-    # DRFT-830
-    # temporarily check
-    # is systems are being present in inventory
-    check_dirty_baselines(query_results)
+    message = "counted baselines"
+    current_app.logger.audit(message, request=request)
 
-    """
-    mapped_systems_count is a list of baseline ids and their associated systems counts.
-    for loop adds mapped system count for each baseline in the list and sets to 0 if none
-    """
-    mapped_systems_count = SystemBaselineMappedSystem.get_mapped_system_count(
-        account_number, org_id, rbac_group_filters=g.get("rbac_filters").get("group.id", None)
-    )
-    for baseline in json_list:
-        baseline["mapped_system_count"] = 0
-        for baseline_count in mapped_systems_count:
-            if baseline["id"] == str(baseline_count[0]):
-                baseline["mapped_system_count"] = baseline_count[1]
+    # the listing is serialized by Connexion rather than here, so its ETag is weak
+    etag = _get_page_etag(page_results, count, total_available, has_next_page)
+    not_modified = _not_modified(etag, weak=True)
+    if not_modified is not None:
+        return not_modified
 
-    return build_paginated_baseline_list_response(
+    json_list = []
+    for result in page_results:
+        baseline_json = result.SystemBaseline.to_json(withhold_facts=True)
+        baseline_json["mapped_system_count"] = result.mapped_system_count
+        json_list.append(baseline_json)
+
+    response = build_paginated_baseline_list_response(
         limit,
         offset,
         order_by,
@@ -307,73 +471,51 @@ def get_baselines(limit, offset, order_by, order_how, display_name=None):
         args_dict=link_args_dict,
     )
 
-
-def check_dirty_baselines(baselines):
-    auth_key = get_key_from_headers(request.headers)
-    account_number = view_helpers.get_account_number(request)
-    org_id = view_helpers.get_org_id(request)
-    for baseline in baselines:
-        if baseline.dirty_systems:
-            for system_id in baseline.mapped_system_ids():
-                try:
-                    # fetch system from inventory
-                    message = "read system with profiles"
-                    current_app.logger.audit(message, request=request)
-                    fetch_systems_with_profiles(
-                        [system_id], auth_key, current_app.logger, get_event_counters()
-                    )
-                except ItemNotReturned:
-                    # not in inventory => delete in our db
-                    try:
-                        SystemBaselineMappedSystem.delete_by_system_ids(
-                            [system_id], account_number, org_id
-                        )
-                    except ValueError as error:
-                        message = str(error)
-                        current_app.logger.audit(message, request=request, success=False)
-                    except Exception:
-                        message = "Unknown error when deleting system with baseline"
-                        current_app.logger.audit(message, request=request, success=False)
-
-            baseline.dirty_systems = False
-            db.session.add(baseline)
-
-    db.session.commit()
-
-
-def group_baselines(baseline):
+    if cursor:
+        # the offset links do not apply to a page after a cursor, only the first page
+        # and the next one, if there is one, are linked
+        response["links"] = {"first": response["links"]["first"], "next": None}
+
+    if has_next_page:
+        next_cursor = _encode_cursor(order_by, order_how, page_results[-1].SystemBaseline)
+        response["links"]["next_cursor"] = next_cursor
+        if cursor:
+            link_args_dict.update(
+                {
+                    "limit": limit,
+                    "order_by": order_by,
+                    "order_how": order_how,
+                    "cursor": next_cursor,
+                }
+            )
+            response["links"]["next"] = "%s?%s" % (request.path, urlencode(link_args_dict))
+
+    return response, HTTPStatus.OK, {"ETag": quote_etag(etag, weak=True)}
+
+
+def group_baselines(baseline, sort=False):
     """
-    return a grouped baseline
+    return a grouped baseline, with facts named "group.name" moved into a "group"
+    category. The given facts are not modified. If `sort` is set, categories, facts
+    and category values are sorted by name as done by `_sort_baseline_facts`; the
+    category values built here are sorted in place rather than copied again.
     """
-
-    def _get_group_name(name):
-        n, _, _ = name.partition(".")
-        return n
-
-    def _get_value_name(name):
-        _, _, n = name.partition(".")
-        return n
-
-    def _find_group(name):
-        for group in grouped_baseline:
-            if group["name"] == name:
-                return group
-
-    # build out group names
-    group_names = {_get_group_name(b["name"]) for b in baseline if "." in b["name"]}
-    grouped_baseline = []
-    for group_name in group_names:
-        grouped_baseline.append({"name": group_name, "values": []})
-
-    # populate groups
+    groups = {}
+    facts = []
     for fact in baseline:
-        if "." in fact["name"]:
-            group = _find_group(_get_group_name(fact["name"]))
-            fact["name"] = _get_value_name(fact["name"])
-            group["values"].append(fact)
+        group_name, dot, value_name = fact["name"].partition(".")
+        if dot:
+            if group_name not in groups:
+                groups[group_name] = {"name": group_name, "values": []}
+            groups[group_name]["values"].append({**fact, "name": value_name})
         else:
-            grouped_baseline.append(fact)
+            facts.append(fact)
 
+    grouped_baseline = list(groups.values()) + facts
+    if sort:
+        for group in groups.values():
+            group["values"].sort(key=_fact_sort_key)
+        grouped_baseline.sort(key=_fact_sort_key)
     return grouped_baseline
 
 
@@ -567,11 +709,16 @@ def _sort_baseline_facts(baseline_facts):
     """
     helper method to sort baseline facts by name before saving to the DB.
     """
-    sorted_baseline_facts = sorted(baseline_facts, key=lambda fact: fact["name"].lower())
-    for fact in sorted_baseline_facts:
+    sorted_baseline_facts = []
+    for fact in baseline_facts:
         if "values" in fact:
-            fact["values"] = sorted(fact["values"], key=lambda fact: fact["name"].lower())
-    return sorted_baseline_facts
+            fact = {**fact, "values": sorted(fact["values"], key=_fact_sort_key)}
+        sorted_baseline_facts.append(fact)
+    return sorted(sorted_baseline_facts, key=_fact_sort_key)
+
+
+def _fact_sort_key(fact):
+    return fact["name"].lower()
 
 
 def _parse_from_sysprofile(system_profile, system_name, logger):
@@ -585,7 +732,7 @@ def _parse_from_sysprofile(system_profile, system_name, logger):
         ]:
             facts.append({"name": fact, "value": parsed_profile[fact]})
 
-    return group_baselines(facts)
+    return group_baselines(facts, sort=True)
 
 
 @metrics.baseline_create_requests.time()
@@ -606,36 +753,34 @@ def copy_baseline_by_id(baseline_id, display_name):
     account_number = view_helpers.get_account_number(request)
     org_id = view_helpers.get_org_id(request)
 
-    _check_for_existing_display_name(display_name, account_number, org_id)
     _check_for_whitespace_in_display_name(display_name)
 
-    message = "counted baselines"
-    current_app.logger.audit(message, request=request)
-
     if org_id:
-        query = SystemBaseline.query.filter(
-            SystemBaseline.org_id == org_id, SystemBaseline.id == baseline_id
-        )
+        tenant_filter = SystemBaseline.org_id == org_id
     else:
-        query = SystemBaseline.query.filter(
-            SystemBaseline.account == account_number, SystemBaseline.id == baseline_id
-        )
+        tenant_filter = SystemBaseline.account == account_number
+
+    # the facts are copied by the database, and the display name unique constraints
+    # stand in for a separate existing display name check
+    copy_baseline = SystemBaseline.copy(baseline_id, display_name, tenant_filter)
+    if copy_baseline is None:
+        db.session.rollback()
+        query = SystemBaseline.query.filter(tenant_filter, SystemBaseline.id == baseline_id)
+        if not db.session.query(query.exists()).scalar():
+            message = "baseline not found"
+            current_app.logger.audit(message, request=request, success=False)
+            raise HTTPError(HTTPStatus.NOT_FOUND, message=message)
 
-    copy_baseline = query.first_or_404()
-    db.session.expunge(copy_baseline)
-    make_transient(copy_baseline)
-    copy_baseline.id = None
-    copy_baseline.created_on = None
-    copy_baseline.modified_on = None
-    copy_baseline.display_name = display_name
-    db.session.add(copy_baseline)
+        message = "A baseline with this name already exists."
+        current_app.logger.audit(message, request=request, success=False)
+        raise HTTPError(HTTPStatus.BAD_REQUEST, message=message)
 
     db.session.commit()
 
     message = "created baselines"
     current_app.logger.audit(message, request=request)
 
-    return copy_baseline.to_json(withhold_systems_count=False)
+    return copy_baseline.to_json(withhold_facts=True, withhold_systems_count=False)
 
 
 # def update_baseline(baseline_id, system_baseline_patch):
@@ -727,6 +872,7 @@ def copy_baseline_by_id(baseline_id, display_name):
 #
 
 
+@reads_from_replica
 def list_systems_with_baseline(baseline_id, group_ids=None, group_names=None):
     ensure_rbac_notifications_read()
     ensure_rbac_inventory_read()
@@ -753,11 +899,6 @@ def list_systems_with_baseline(baseline_id, group_ids=None, group_names=None):
 
     baseline = query.first_or_404()
 
-    # DRFT-830
-    # temporarily check
-    # is systems are being present in inventory
-    check_dirty_baselines([baseline])
-
     message = "read baseline"
     current_app.logger.audit(message, request=request, success=True)
 
@@ -869,8 +1010,7 @@ def delete_systems_with_baseline(baseline_id, system_ids):
     current_app.logger.audit(message, request=request, success=True)
 
     try:
-        for system_id in system_ids:
-            baseline.remove_mapped_system(system_id)
+        baseline.remove_mapped_systems(system_ids)
         db.session.commit()
     except ValueError as error:
         message = str(error)
@@ -884,7 +1024,6 @@ def delete_systems_with_baseline(baseline_id, system_ids):
     message = "deleted systems with baseline"
     current_app.logger.audit(message, request=request, success=True)
 
-    system_ids = baseline.mapped_system_ids()
     return "OK"
 
 
@@ -903,8 +1042,4 @@ def _validate_facts(facts):
     helper to run common validations
     """
     validators.check_facts_length(facts)
-    validators.check_for_duplicate_names(facts)
-    validators.check_for_empty_name_values(facts)
-    validators.check_for_invalid_whitespace_name_values(facts)
-    validators.check_for_value_values(facts)
-    validators.check_name_value_length(facts)
+    validators.validate_facts(facts)
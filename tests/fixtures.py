@@ -39,6 +39,11 @@ AUTH_HEADER = {
 }
 
 
+# the tenant of AUTH_HEADER
+AUTH_ACCOUNT_NUMBER = "1234"
+AUTH_ORG_ID = "5678"
+
+
 AUTH_HEADER_NO_ENTITLEMENTS = {
     "X-RH-IDENTITY": "eyJpZGVudGl0eSI6eyJhY2NvdW50X251bWJlciI6Ij"
     "EyMzQiLCJ0eXBlIjoiVXNlciIsInVzZXIiOnsidXNl"
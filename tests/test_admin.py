@@ -0,0 +1,57 @@
+import unittest
+
+import mock
+
+from flask import Flask
+
+from system_baseline.periodic import PeriodicRefresh
+from system_baseline.views import admin
+
+from .test_db_models import DbModelTest
+
+
+class StatusReportTest(DbModelTest):
+    def test_build_status_report(self):
+        self.populate_db_with_stuff()
+
+        report = admin.build_status_report()
+
+        self.assertEqual(report["totalBaselinesCount"], 4)
+        self.assertEqual(report["customerIdsCount"], 2)
+        self.assertEqual(report["createdBaselinesToday"], 4)
+        self.assertEqual(
+            report["BaselinesBuckets"], {"1": 0, "2": 2, "3": 0, "4": 0, "5-10": 0, "10+": 0}
+        )
+        self.assertEqual(report["totalBaselinesWithAssociationsCount"], 4)
+        self.assertEqual(
+            report["BaselinesAssociationsBuckets"],
+            {"1": 0, "2": 2, "3": 2, "4": 0, "5-10": 0, "10+": 0},
+        )
+
+    def test_build_status_report_empty(self):
+        report = admin.build_status_report()
+
+        self.assertEqual(report["totalBaselinesCount"], 0)
+        self.assertEqual(report["customerIdsCount"], 0)
+        self.assertEqual(report["createdBaselinesMonth"], 0)
+        self.assertEqual(report["totalBaselinesWithAssociationsCount"], 0)
+
+
+class PeriodicRefreshTest(unittest.TestCase):
+    def test_get_returns_cached_value(self):
+        refresh = mock.Mock(side_effect=[1, 2])
+        periodic_refresh = PeriodicRefresh("test", refresh, interval=3600)
+        self.addCleanup(periodic_refresh.stop)
+        app = Flask(__name__)
+
+        self.assertEqual(periodic_refresh.get(app), 1)
+        self.assertEqual(periodic_refresh.get(app), 1)
+        refresh.assert_called_once()
+
+    def test_get_refreshes_without_interval(self):
+        refresh = mock.Mock(side_effect=[1, 2])
+        periodic_refresh = PeriodicRefresh("test", refresh, interval=0)
+        app = Flask(__name__)
+
+        self.assertEqual(periodic_refresh.get(app), 1)
+        self.assertEqual(periodic_refresh.get(app), 2)
@@ -0,0 +1,149 @@
+import asyncio
+import unittest
+import uuid
+
+from http import HTTPStatus
+from types import SimpleNamespace
+
+import mock
+
+from kerlescan.exceptions import HTTPError
+from starlette.testclient import TestClient
+
+from system_baseline import app, async_app, async_rbac, global_helpers
+from system_baseline.async_views import v1 as async_v1
+
+from . import fixtures
+
+
+GROUP_FILTERS = [{"id": "g1"}, {"id": None}]
+
+
+def _ensure_has_permission(**kwargs):
+    """
+    kerlescan's permission check, granting drift permissions without filters and
+    inventory permissions on some groups
+    """
+    if kwargs["application"] == "inventory":
+        kwargs["rbac_filters"]["group.id"] = GROUP_FILTERS
+
+
+CHECKS = [
+    (global_helpers.BASELINES_READ_PERMISSIONS, "drift"),
+    (global_helpers.NOTIFICATIONS_READ_PERMISSIONS, "drift"),
+    (global_helpers.INVENTORY_READ_PERMISSIONS, "inventory"),
+]
+
+
+@mock.patch("system_baseline.async_rbac.view_helpers.ensure_has_permission")
+class EnsureHasPermissionsTest(unittest.TestCase):
+    def setUp(self):
+        async_rbac.async_rbac_permission_cache.clear()
+        self.addCleanup(async_rbac.async_rbac_permission_cache.clear)
+        self.kerlescan_request = SimpleNamespace(
+            path="/api/system-baseline/v1/baselines",
+            headers={"x-rh-identity": fixtures.AUTH_HEADER["X-RH-IDENTITY"]},
+        )
+        self.logger = mock.Mock()
+
+    def _ensure_has_permissions(self):
+        return asyncio.run(
+            async_rbac.ensure_has_permissions(self.kerlescan_request, self.logger, CHECKS)
+        )
+
+    @mock.patch("system_baseline.async_rbac.config.enable_rbac", True)
+    def test_runs_kerlescan_checks_and_caches_them(self, mock_ensure_has_permission):
+        mock_ensure_has_permission.side_effect = _ensure_has_permission
+
+        for _ in range(2):
+            self.assertEqual(self._ensure_has_permissions(), {"group.id": GROUP_FILTERS})
+
+        self.assertEqual(mock_ensure_has_permission.call_count, len(CHECKS))
+        for (permissions, application), call in zip(
+            CHECKS, mock_ensure_has_permission.call_args_list
+        ):
+            self.assertEqual(call[1]["permissions"], permissions)
+            self.assertEqual(call[1]["application"], application)
+            self.assertIs(call[1]["request"], self.kerlescan_request)
+            self.assertIs(call[1]["logger"], self.logger)
+
+    @mock.patch("system_baseline.async_rbac.config.enable_rbac", True)
+    def test_denials_are_not_cached(self, mock_ensure_has_permission):
+        mock_ensure_has_permission.side_effect = HTTPError(
+            HTTPStatus.FORBIDDEN, message="user does not have access"
+        )
+
+        with self.assertRaises(HTTPError) as context:
+            self._ensure_has_permissions()
+        self.assertEqual(context.exception.status_code, HTTPStatus.FORBIDDEN)
+
+        # every check is made again once access is granted
+        mock_ensure_has_permission.reset_mock(side_effect=True)
+        self.assertEqual(self._ensure_has_permissions(), {})
+        self.assertEqual(mock_ensure_has_permission.call_count, len(CHECKS))
+
+    @mock.patch("system_baseline.async_rbac.config.enable_rbac", False)
+    def test_passes_without_rbac_are_not_cached(self, mock_ensure_has_permission):
+        for _ in range(2):
+            self.assertEqual(self._ensure_has_permissions(), {})
+
+        self.assertEqual(mock_ensure_has_permission.call_count, 2 * len(CHECKS))
+
+
+class AsyncDispatcherTest(unittest.TestCase):
+    def setUp(self):
+        async_rbac.async_rbac_permission_cache.clear()
+        self.addCleanup(async_rbac.async_rbac_permission_cache.clear)
+        self.dispatcher = async_app.create_async_dispatcher(
+            app.create_app(), app.get_openapi_args()
+        )
+        self.baseline_url = "api/system-baseline/v1/baselines/%s" % uuid.uuid4()
+
+    def test_routes(self):
+        self.assertFalse(self.dispatcher.is_async(self._scope("GET", "/" + self.baseline_url)))
+        self.assertTrue(
+            self.dispatcher.is_async(self._scope("GET", "/%s/systems" % self.baseline_url))
+        )
+        self.assertFalse(
+            self.dispatcher.is_async(self._scope("POST", "/%s/systems" % self.baseline_url))
+        )
+
+    @mock.patch("system_baseline.async_rbac.config.enable_rbac", True)
+    @mock.patch("system_baseline.async_views.v1.view_helpers")
+    @mock.patch("system_baseline.async_views.v1._read_mapped_system_ids")
+    @mock.patch("system_baseline.async_rbac.view_helpers.ensure_has_permission")
+    def test_list_systems_with_baseline(
+        self, mock_ensure_has_permission, mock_read, mock_view_helpers
+    ):
+        mock_ensure_has_permission.side_effect = _ensure_has_permission
+        mock_read.return_value = ["system1"]
+        mock_view_helpers.get_org_id.return_value = "org1"
+
+        with TestClient(self.dispatcher) as client:
+            response = client.get(self.baseline_url + "/systems", headers=fixtures.AUTH_HEADER)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"system_ids": ["system1"]})
+        self.assertIn("Strict-Transport-Security", response.headers)
+        self.assertEqual(mock_read.call_args[1]["rbac_group_filters"], GROUP_FILTERS)
+
+    @mock.patch("system_baseline.async_rbac.config.enable_rbac", False)
+    @mock.patch("system_baseline.async_views.v1.view_helpers")
+    @mock.patch("system_baseline.async_views.v1._read_mapped_system_ids")
+    @mock.patch("system_baseline.async_rbac.view_helpers.ensure_has_permission")
+    def test_list_systems_with_missing_baseline(
+        self, mock_ensure_has_permission, mock_read, mock_view_helpers
+    ):
+        mock_read.return_value = None
+
+        with TestClient(self.dispatcher) as client:
+            response = client.get(self.baseline_url + "/systems", headers=fixtures.AUTH_HEADER)
+
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {"message": "baseline not found"})
+
+    def _scope(self, method, path):
+        return {"type": "http", "method": method, "path": path}
+
+    def tearDown(self):
+        async_v1.init_app(None)
@@ -2,9 +2,12 @@ import unittest
 import uuid
 
 from flask import Flask
+from sqlalchemy import event, insert, inspect, text, tuple_, update
+from sqlalchemy.orm import defer
 
-from system_baseline import db_config
+from system_baseline import db_config, reconciler
 from system_baseline.models import SystemBaseline, SystemBaselineMappedSystem, db
+from system_baseline.views import v1
 
 
 baseline_facts = [
@@ -186,6 +189,58 @@ class SystemBaselineTest(DbModelTest):
         self.assertEqual(results[0].account, account1)
         self.assertEqual(results[0].org_id, org_id1)
 
+    def test_fact_count_without_loading_facts(self):
+        baseline = SystemBaseline(
+            account=account1,
+            org_id=org_id1,
+            display_name="baseline1",
+            baseline_facts=baseline_facts,
+        )
+        db.session.add(baseline)
+        db.session.commit()
+        db.session.expunge_all()
+
+        result = (
+            SystemBaseline.query.filter(SystemBaseline.account == account1)
+            .options(defer(SystemBaseline.baseline_facts))
+            .one()
+        )
+        self.assertIn("baseline_facts", inspect(result).unloaded)
+        self.assertEqual(result.fact_count, 2)
+        self.assertIn("baseline_facts", inspect(result).unloaded)
+
+    def test_copy(self):
+        baseline = SystemBaseline(
+            account=account1,
+            org_id=org_id1,
+            display_name="baseline1",
+            baseline_facts=baseline_facts,
+            dirty_systems=True,
+        )
+        db.session.add(baseline)
+        db.session.commit()
+
+        tenant_filter = SystemBaseline.org_id == org_id1
+        copy = SystemBaseline.copy(baseline.id, "copy of baseline1", tenant_filter)
+        db.session.commit()
+
+        self.assertNotEqual(copy.id, baseline.id)
+        self.assertEqual(copy.display_name, "copy of baseline1")
+        self.assertEqual(copy.fact_count, 2)
+        self.assertEqual(copy.mapped_system_count, 0)
+        copied = db.session.get(SystemBaseline, copy.id)
+        self.assertEqual(copied.baseline_facts, baseline_facts)
+        self.assertEqual(copied.account, account1)
+        self.assertFalse(copied.dirty_systems)
+
+        # the display name is taken now
+        self.assertIsNone(SystemBaseline.copy(baseline.id, "copy of baseline1", tenant_filter))
+        db.session.rollback()
+        # baselines of other tenants are not copied
+        other_tenant_filter = SystemBaseline.org_id == "another org"
+        self.assertIsNone(SystemBaseline.copy(baseline.id, "another copy", other_tenant_filter))
+        self.assertEqual(SystemBaseline.query.count(), 2)
+
 
 class SystemBaselineNotificationEnabledTest(DbModelTest):
     def test_of_default(self):
@@ -333,6 +388,61 @@ class SystemBaselineMappedSystemTest(DbModelTest):
             result.remove_mapped_system(str(uuid.uuid4()))
             self.assertTrue("Failed to remove system id" in str(context.exception))
 
+    def test_add_mapped_systems(self):
+        baseline = SystemBaseline(
+            account=account1,
+            org_id=org_id1,
+            display_name="baseline1",
+            baseline_facts=baseline_facts,
+        )
+        db.session.add(baseline)
+        test_system_ids = [str(uuid.uuid4()) for i in range(4)]
+        groups = {test_system_ids[0]: [{"id": "group_id_1", "name": "group_name_1"}]}
+        baseline.add_mapped_systems(test_system_ids, groups)
+        db.session.commit()
+
+        result = SystemBaseline.query.filter(SystemBaseline.account == account1).one()
+        self.assertEqual(sorted(result.mapped_system_ids()), sorted(test_system_ids))
+        self.assertEqual(
+            result.mapped_system_ids(rbac_group_filters=[{"id": "group_id_1"}]),
+            [test_system_ids[0]],
+        )
+
+        new_system_id = str(uuid.uuid4())
+        with self.assertRaises(ValueError) as context:
+            result.add_mapped_systems([new_system_id, test_system_ids[1]])
+        self.assertIn(test_system_ids[1], str(context.exception))
+        self.assertNotIn(new_system_id, str(context.exception))
+        db.session.commit()
+        self.assertEqual(sorted(result.mapped_system_ids()), sorted(test_system_ids))
+        self.assertEqual(result.mapped_system_count, 4)
+
+    def test_remove_mapped_systems(self):
+        baseline = SystemBaseline(
+            account=account1,
+            org_id=org_id1,
+            display_name="baseline1",
+            baseline_facts=baseline_facts,
+        )
+        db.session.add(baseline)
+        test_system_ids = [str(uuid.uuid4()) for i in range(4)]
+        baseline.add_mapped_systems(test_system_ids)
+        db.session.commit()
+
+        result = SystemBaseline.query.filter(SystemBaseline.account == account1).one()
+        result.remove_mapped_systems(test_system_ids[:2])
+        db.session.commit()
+        self.assertEqual(sorted(result.mapped_system_ids()), sorted(test_system_ids[2:]))
+
+        missing_system_id = str(uuid.uuid4())
+        with self.assertRaises(ValueError) as context:
+            result.remove_mapped_systems([test_system_ids[2], missing_system_id])
+        self.assertIn(missing_system_id, str(context.exception))
+        self.assertNotIn(test_system_ids[2], str(context.exception))
+        db.session.commit()
+        self.assertEqual(sorted(result.mapped_system_ids()), sorted(test_system_ids[2:]))
+        self.assertEqual(result.mapped_system_count, 2)
+
     def test_cascade_delete(self):
         self.populate_db_with_stuff()
         query = SystemBaseline.query.filter(
@@ -412,20 +522,82 @@ class SystemBaselineMappedSystemTest(DbModelTest):
         self.assertIn(system_id8, system_ids)
         self.assertIn(system_id9, system_ids)
 
-    def test_get_mapped_system_count(self):
+    def test_mapped_system_count(self):
         self.populate_db_with_stuff()
 
-        mapped_systems_count = SystemBaselineMappedSystem.get_mapped_system_count(account1, org_id1)
+        baseline = db.session.get(SystemBaseline, baseline_id1)
+        self.assertEqual(baseline.mapped_system_count, 3)
 
-        self.assertEqual(
-            sorted(mapped_systems_count), sorted([(baseline_id1, 3), (baseline_id2, 2)])
+        baseline.add_mapped_systems([str(system_id4), str(system_id5)])
+        self.assertEqual(baseline.mapped_system_count, 5)
+        baseline.remove_mapped_systems([str(system_id1)])
+        self.assertEqual(baseline.mapped_system_count, 4)
+        db.session.commit()
+
+        SystemBaselineMappedSystem.delete_by_system_ids([system_id2, system_id6], None, org_id1)
+        baseline = db.session.get(SystemBaseline, baseline_id1)
+        self.assertEqual(baseline.mapped_system_count, 3)
+        self.assertEqual(db.session.get(SystemBaseline, baseline_id3).mapped_system_count, 2)
+        self.assertEqual(baseline.to_json(withhold_systems_count=False)["mapped_system_count"], 3)
+
+    def test_reconcile_mapped_system_counts(self):
+        self.populate_db_with_stuff()
+        db.session.execute(
+            update(SystemBaseline)
+            .where(SystemBaseline.id.in_([baseline_id1, baseline_id2]))
+            .values(mapped_system_count=10)
         )
+        db.session.commit()
 
-        mapped_systems_count = SystemBaselineMappedSystem.get_mapped_system_count(account2, org_id2)
+        repaired_baseline_ids = SystemBaseline.reconcile_mapped_system_counts()
+        db.session.commit()
 
-        self.assertEqual(
-            sorted(mapped_systems_count), sorted([(baseline_id3, 2), (baseline_id4, 3)])
+        self.assertEqual(sorted(repaired_baseline_ids), sorted([baseline_id1, baseline_id2]))
+        self.assertEqual(db.session.get(SystemBaseline, baseline_id1).mapped_system_count, 3)
+        self.assertEqual(db.session.get(SystemBaseline, baseline_id2).mapped_system_count, 2)
+        self.assertEqual(SystemBaseline.reconcile_mapped_system_counts(), [])
+
+    def test_get_page_query(self):
+        self.populate_db_with_stuff()
+
+        tenant_filter = SystemBaseline.org_id == org_id1
+        query = SystemBaseline.get_page_query(tenant_filter, [tenant_filter])
+        results = query.order_by(SystemBaseline.display_name.asc()).limit(1).all()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].SystemBaseline.id, baseline_id1)
+        self.assertEqual(results[0].count, 2)
+        self.assertEqual(results[0].total_available, 2)
+        self.assertEqual(results[0].mapped_system_count, 3)
+
+        filters = [tenant_filter, SystemBaseline.display_name == "baseline2"]
+        query = SystemBaseline.get_page_query(tenant_filter, filters)
+        results = query.all()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].SystemBaseline.id, baseline_id2)
+        self.assertEqual(results[0].count, 1)
+        self.assertEqual(results[0].total_available, 2)
+        self.assertEqual(results[0].mapped_system_count, 2)
+
+    def test_get_page_query_with_keyset_filter(self):
+        self.populate_db_with_stuff()
+
+        tenant_filter = SystemBaseline.org_id == org_id1
+        keyset_filter = tuple_(SystemBaseline.display_name, SystemBaseline.id) > (
+            "baseline1",
+            baseline_id1,
+        )
+        query = SystemBaseline.get_page_query(
+            tenant_filter, [tenant_filter], keyset_filter=keyset_filter
         )
+        results = query.order_by(SystemBaseline.display_name.asc()).all()
+
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].SystemBaseline.id, baseline_id2)
+        # the count is not limited by the keyset filter
+        self.assertEqual(results[0].count, 2)
+        self.assertEqual(results[0].total_available, 2)
 
 
 class MappedSystemsWithGroupsTest(DbModelTest):
@@ -497,3 +669,135 @@ class MappedSystemsWithGroupsTest(DbModelTest):
         rbac_group_filters = [{"id": None}]
         mapped_systems = baseline.mapped_system_ids(rbac_group_filters=rbac_group_filters)
         self.assertEqual(1, len(mapped_systems))
+
+
+class QueryPlanTest(DbModelTest):
+    """
+    the queries are built, or run, by the code that serves them, so that the plans
+    follow changes to that code
+    """
+
+    def setUp(self):
+        super(QueryPlanTest, self).setUp()
+        self.populate_db_with_stuff()
+
+    def assertUsesIndex(self, query, *index_names):
+        """
+        assert that `query` is planned with one of `index_names` and without
+        sequential scans
+        """
+        statement = query.statement.compile(
+            dialect=db.engine.dialect, compile_kwargs={"literal_binds": True}
+        )
+        self.assertPlanUsesIndex(self.explain(str(statement)), *index_names)
+
+    def assertPlanUsesIndex(self, plan, *index_names):
+        self.assertTrue(
+            any(" %s " % index_name in plan for index_name in index_names),
+            "none of %s in plan:\n%s" % (", ".join(index_names), plan),
+        )
+        self.assertNotIn("Seq Scan", plan)
+
+    def explain(self, statement, parameters=None):
+        """
+        return the plan of `statement`
+        """
+        # the test tables are tiny, so sequential scans would always win
+        db.session.execute(text("SET LOCAL enable_seqscan = off"))
+        rows = db.session.connection().exec_driver_sql("EXPLAIN %s" % statement, parameters)
+        plan = "\n".join(row[0] for row in rows)
+        db.session.rollback()
+        return plan
+
+    def explain_statements(self, function, *args):
+        """
+        run `function` and return the plans of the statements it ran
+        """
+        statements = []
+
+        def record_statement(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(db.engine, "before_cursor_execute", record_statement)
+        try:
+            function(*args)
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record_statement)
+        db.session.rollback()
+
+        self.assertTrue(statements)
+        return [self.explain(statement, parameters) for statement, parameters in statements]
+
+    def get_page_query(self, filters, order_by):
+        """
+        return the query of a page of baselines of org_id1, as the views build it
+        """
+        tenant_filter = SystemBaseline.org_id == org_id1
+        query = SystemBaseline.get_page_query(tenant_filter, [tenant_filter, *filters])
+        query = query.options(defer(SystemBaseline.baseline_facts))
+        return v1._create_ordering(order_by, "ASC", query).limit(10)
+
+    def test_baselines_page_uses_index(self):
+        self.assertUsesIndex(
+            self.get_page_query([], "display_name"),
+            "ix_system_baselines_org_id_display_name_id",
+            "_org_id_display_name_uc",
+        )
+
+    def test_baselines_by_ids_page_uses_index(self):
+        self.assertUsesIndex(
+            self.get_page_query(
+                [SystemBaseline.id.in_([baseline_id1, baseline_id2])], "display_name"
+            ),
+            "system_baselines_pkey",
+            "ix_system_baselines_org_id_display_name_id",
+            "_org_id_display_name_uc",
+        )
+
+    def test_display_name_searches_use_indexes(self):
+        # enough baselines in the org for the planner to prefer the search indexes to
+        # reading all of the org's baselines
+        db.session.execute(
+            insert(SystemBaseline),
+            [
+                {"account": account1, "org_id": org_id1, "display_name": display_name}
+                for display_name in ["a needle in a haystack"]
+                + ["hay baseline %d" % i for i in range(2000)]
+            ],
+        )
+        db.session.commit()
+        db.session.execute(text("ANALYZE system_baselines"))
+        db.session.commit()
+
+        tenant_filter = SystemBaseline.org_id == org_id1
+        for display_name, display_name_match, index_name in (
+            ("Needle", "contains", "ix_system_baselines_org_id_display_name_trgm"),
+            ("A Needle", "prefix", "ix_system_baselines_org_id_display_name_prefix"),
+        ):
+            with self.subTest(display_name_match=display_name_match):
+                display_name_filter = v1.get_display_name_filter(display_name, display_name_match)
+                self.assertEqual(
+                    SystemBaseline.query.filter(tenant_filter, display_name_filter).count(), 1
+                )
+                self.assertUsesIndex(
+                    self.get_page_query([display_name_filter], "display_name"), index_name
+                )
+
+    def test_mapped_systems_by_system_id_uses_index(self):
+        plans = self.explain_statements(
+            SystemBaselineMappedSystem.delete_by_system_ids, [str(system_id1)], account1, org_id1
+        )
+        for plan in plans:
+            self.assertPlanUsesIndex(plan, "ix_system_baseline_mapped_systems_org_id_system_id")
+
+    def test_mapped_systems_by_baseline_ids_uses_index(self):
+        baselines = SystemBaseline.query.filter(
+            SystemBaseline.id.in_([baseline_id1, baseline_id2])
+        ).all()
+        plans = self.explain_statements(
+            reconciler._read_mapped_system_ids, baselines, account1, org_id1
+        )
+        for plan in plans:
+            self.assertPlanUsesIndex(
+                plan, "ix_system_baseline_mapped_systems_org_id_system_baseline_id"
+            )
@@ -1,8 +1,12 @@
 import unittest
 
+from http import HTTPStatus
+
 import mock
 
-from system_baseline import app
+from kerlescan.exceptions import HTTPError
+
+from system_baseline import app, global_helpers
 
 from . import fixtures
 
@@ -32,3 +36,91 @@ class GlobalHelpersEnsureOrgIdTest(GlobalHelpersApiTest):
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             mocked_kerlescan_ensure_method.assert_called_once()
         self.assertEqual(response.status_code, 200)
+
+
+class PermissionCacheTest(unittest.TestCase):
+    @mock.patch("system_baseline.global_helpers.time.monotonic")
+    def test_expires_entries_after_ttl(self, mock_monotonic):
+        cache = global_helpers.PermissionCache(ttl=60, maxsize=10)
+        mock_monotonic.return_value = 100
+        cache.set("key", {"group.id": []})
+
+        mock_monotonic.return_value = 159
+        self.assertEqual(cache.get("key"), {"group.id": []})
+        mock_monotonic.return_value = 160
+        self.assertIsNone(cache.get("key"))
+
+    def test_evicts_least_recently_used(self):
+        cache = global_helpers.PermissionCache(ttl=60, maxsize=2)
+        cache.set("first", {})
+        cache.set("second", {})
+        cache.get("first")
+        cache.set("third", {})
+
+        self.assertEqual(cache.get("first"), {})
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("third"), {})
+
+    def test_disabled_with_zero_ttl(self):
+        cache = global_helpers.PermissionCache(ttl=0, maxsize=2)
+        cache.set("key", {})
+
+        self.assertIsNone(cache.get("key"))
+
+
+class GlobalHelpersRbacCacheTest(GlobalHelpersApiTest):
+    def setUp(self):
+        super(GlobalHelpersRbacCacheTest, self).setUp()
+        global_helpers.rbac_permission_cache.clear()
+        self.addCleanup(global_helpers.rbac_permission_cache.clear)
+        enable_rbac_patcher = mock.patch("system_baseline.global_helpers.config.enable_rbac", True)
+        enable_rbac_patcher.start()
+        self.addCleanup(enable_rbac_patcher.stop)
+
+    @mock.patch("system_baseline.global_helpers.view_helpers.ensure_has_permission")
+    def test_permissions_checked_once_per_identity(self, mock_ensure_has_permission):
+        def _ensure_has_permission(**kwargs):
+            kwargs["rbac_filters"]["group.id"] = [{"id": None}]
+
+        mock_ensure_has_permission.side_effect = _ensure_has_permission
+
+        with self.client() as client:
+            for _ in range(2):
+                response = client.get(
+                    "api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER
+                )
+                self.assertEqual(response.status_code, 200)
+
+        # the before request hook and the view both ensure baselines read, and the
+        # second request is answered from the cache
+        mock_ensure_has_permission.assert_called_once()
+
+    @mock.patch("system_baseline.global_helpers.view_helpers.ensure_has_permission")
+    def test_denied_permissions_not_cached(self, mock_ensure_has_permission):
+        mock_ensure_has_permission.side_effect = HTTPError(HTTPStatus.FORBIDDEN, message="denied")
+
+        with self.client() as client:
+            for _ in range(2):
+                response = client.get(
+                    "api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER
+                )
+                self.assertEqual(response.status_code, 403)
+
+        self.assertEqual(mock_ensure_has_permission.call_count, 2)
+
+    @mock.patch("system_baseline.global_helpers.view_helpers.ensure_has_permission")
+    def test_passes_without_rbac_not_cached(self, mock_ensure_has_permission):
+        def _ensure_has_permission(**kwargs):
+            # kerlescan does not ask RBAC for the management API and openapi.json
+            path = kwargs["request"].path
+            if path.startswith("/mgmt/") or path.endswith("openapi.json"):
+                return
+            raise HTTPError(HTTPStatus.FORBIDDEN, message="denied")
+
+        mock_ensure_has_permission.side_effect = _ensure_has_permission
+
+        with self.client() as client:
+            client.get("api/system-baseline/v1/openapi.json", headers=fixtures.AUTH_HEADER)
+            client.get("mgmt/v0/status", headers=fixtures.AUTH_HEADER)
+            response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
+        self.assertEqual(response.status_code, 403)
@@ -2,8 +2,6 @@ import json
 import unittest
 import uuid
 
-import mock
-
 from mock import patch
 
 from system_baseline import app
@@ -26,8 +24,7 @@ class ApiTest(unittest.TestCase):
 
 
 class ApiSystemsAssociationTests(ApiTest):
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def setUp(self, mock_fetch_systems):
+    def setUp(self):
         super(ApiSystemsAssociationTests, self).setUp()
 
         with self.client() as client:
@@ -37,10 +34,6 @@ class ApiSystemsAssociationTests(ApiTest):
                 str(uuid.uuid4()),
             ]
 
-            mock_fetch_systems.return_value = [
-                fixtures.a_system_with_profile(system_id) for system_id in self.system_ids
-            ]
-
             client.post(
                 "api/system-baseline/v1/baselines",
                 headers=fixtures.AUTH_HEADER,
@@ -59,13 +52,9 @@ class ApiSystemsAssociationTests(ApiTest):
             )
             self.assertEqual(response.status_code, 200)
 
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def tearDown(self, mock_fetch_systems):
+    def tearDown(self):
         super(ApiSystemsAssociationTests, self).tearDown()
         with self.client() as client:
-            mock_fetch_systems.return_value = [
-                fixtures.a_system_with_profile(system_id) for system_id in self.system_ids
-            ]
             # get all baselines
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             baselines = json.loads(response.content)["data"]
@@ -170,8 +159,7 @@ class ApiSystemsAssociationTests(ApiTest):
             self.assertNotIn(system_ids[0], response_system_ids)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_adding_few_systems(self, mock_fetch_systems):
+    def test_adding_few_systems(self):
         with self.client() as client:
             # to create
             system_ids = [
@@ -179,10 +167,6 @@ class ApiSystemsAssociationTests(ApiTest):
                 str(uuid.uuid4()),
             ]
 
-            mock_fetch_systems.return_value = [
-                fixtures.a_system_with_profile(system_id) for system_id in system_ids
-            ]
-
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -202,11 +186,7 @@ class ApiSystemsAssociationTests(ApiTest):
                 self.assertIn(system_id, response_system_ids)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_deleting_systems_by_id(
-        self,
-        mock_fetch_systems,
-    ):
+    def test_deleting_systems_by_id(self):
         with self.client() as client:
             # to create
             system_ids = [
@@ -216,9 +196,6 @@ class ApiSystemsAssociationTests(ApiTest):
                 str(uuid.uuid4()),
             ]
 
-            mock_fetch_systems.return_value = [
-                fixtures.a_system_with_profile(system_id) for system_id in system_ids
-            ]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -258,8 +235,7 @@ class ApiSystemsAssociationTests(ApiTest):
                 self.assertIn(system_id, response_system_ids)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_creating_deletion_request_for_systems_by_id(self, mock_fetch_systems):
+    def test_creating_deletion_request_for_systems_by_id(self):
         with self.client() as client:
             # to create
             system_ids = [
@@ -269,9 +245,6 @@ class ApiSystemsAssociationTests(ApiTest):
                 str(uuid.uuid4()),
             ]
 
-            mock_fetch_systems.return_value = [
-                fixtures.a_system_with_profile(system_id) for system_id in system_ids
-            ]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -313,11 +286,9 @@ class ApiSystemsAssociationTests(ApiTest):
 
 
 class InternalApiBaselinesTests(ApiTest):
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def setUp(self, mock_fetch_systems):
+    def setUp(self):
         super(InternalApiBaselinesTests, self).setUp()
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             for baseline_load in [
                 fixtures.BASELINE_ONE_LOAD,
                 fixtures.BASELINE_TWO_LOAD,
@@ -336,11 +307,9 @@ class InternalApiBaselinesTests(ApiTest):
             self.baseline_ids = [b["id"] for b in result["data"]]
             self.assertEqual(len(self.baseline_ids), 3)
 
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def tearDown(self, mock_fetch_systems):
+    def tearDown(self):
         super(InternalApiBaselinesTests, self).tearDown()
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             data = json.loads(response.content)["data"]
             for baseline in data:
@@ -371,10 +340,8 @@ class InternalApiBaselinesTests(ApiTest):
                 self.assertEqual(response.status_code, 200)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_no_baselines_by_system_id(self, mock_fetch_systems):
+    def test_no_baselines_by_system_id(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             system_id = str(uuid.uuid4())
 
             response = client.get(
@@ -388,11 +355,9 @@ class InternalApiBaselinesTests(ApiTest):
             self.assertEqual(len(response_baseline_ids), 0)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_one_baseline_by_system_id(self, mock_fetch_systems):
+    def test_one_baseline_by_system_id(self):
         with self.client() as client:
             system_id = str(uuid.uuid4())
-            mock_fetch_systems.return_value = [fixtures.a_system_with_profile(system_id)]
             baseline_ids = self.baseline_ids[0:1]
 
             for baseline_id in baseline_ids:
@@ -414,11 +379,9 @@ class InternalApiBaselinesTests(ApiTest):
             self.assertEqual(len(response_baseline_ids), len(baseline_ids))
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_few_baselines_by_system_id(self, mock_fetch_systems):
+    def test_few_baselines_by_system_id(self):
         with self.client() as client:
             system_id = str(uuid.uuid4())
-            mock_fetch_systems.return_value = [fixtures.a_system_with_profile(system_id)]
             baseline_ids = self.baseline_ids[0:2]
 
             for baseline_id in baseline_ids:
@@ -441,12 +404,10 @@ class InternalApiBaselinesTests(ApiTest):
 
 
 class ApiMappedSystemPatchTests(ApiTest):
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def setUp(self, mock_fetch_systems):
+    def setUp(self):
         super(ApiMappedSystemPatchTests, self).setUp()
         with self.client() as client:
             self.system_id = str(uuid.uuid4())
-            mock_fetch_systems.return_value = [fixtures.a_system_with_profile(self.system_id)]
 
             # create a few baselines
             for i in range(1, 4):
@@ -469,11 +430,9 @@ class ApiMappedSystemPatchTests(ApiTest):
                     json={"system_ids": [self.system_id]},
                 )
 
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def tearDown(self, mock_fetch_systems):
+    def tearDown(self):
         super(ApiMappedSystemPatchTests, self).tearDown()
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.a_system_with_profile(self.system_id)]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             data = json.loads(response.content)["data"]
             for baseline in data:
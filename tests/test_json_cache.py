@@ -0,0 +1,97 @@
+import json
+import unittest
+
+from types import SimpleNamespace
+
+from sqlalchemy import update
+
+from system_baseline import json_cache, metrics
+from system_baseline.models import SystemBaseline, db
+from system_baseline.views import v1
+
+from .test_db_models import DbModelTest, account1, baseline_facts, org_id1
+
+
+class JsonFragmentCacheTest(unittest.TestCase):
+    def test_evicts_least_recently_used_over_max_bytes(self):
+        cache = json_cache.JsonFragmentCache(max_bytes=10)
+        cache.set("first", "aaaa")
+        cache.set("second", "bbbb")
+        cache.get("first")
+        cache.set("third", "cccc")
+
+        self.assertEqual(cache.get("first"), "aaaa")
+        self.assertIsNone(cache.get("second"))
+        self.assertEqual(cache.get("third"), "cccc")
+        self.assertEqual(cache.size, 8)
+
+    def test_size_is_counted_in_encoded_bytes(self):
+        cache = json_cache.JsonFragmentCache(max_bytes=10)
+        cache.set("key", "é" * 5)
+        cache.set("key", "é" * 6)
+
+        self.assertEqual(cache.get("key"), "é" * 5)
+        self.assertEqual(cache.size, 10)
+
+    def test_disabled_with_zero_max_bytes(self):
+        cache = json_cache.JsonFragmentCache(max_bytes=0)
+        cache.set("key", "a")
+
+        self.assertIsNone(cache.get("key"))
+
+
+class BaselineFactsTest(DbModelTest):
+    def setUp(self):
+        super(BaselineFactsTest, self).setUp()
+        json_cache.baseline_json_cache.clear()
+        self.addCleanup(json_cache.baseline_json_cache.clear)
+        self.baseline = SystemBaseline(
+            account=account1,
+            org_id=org_id1,
+            display_name="baseline1",
+            baseline_facts=baseline_facts,
+        )
+        db.session.add(self.baseline)
+        db.session.commit()
+        self.page_results = [SimpleNamespace(SystemBaseline=self.baseline, mapped_system_count=3)]
+
+    def stream_page(self):
+        page = {"meta": {}, "links": {}}
+        facts = v1._get_baseline_facts(self.page_results)
+        return json.loads("".join(v1._stream_baselines_page(page, self.page_results, facts)))
+
+    def test_facts_are_cached_by_modification_time(self):
+        facts = v1._get_baseline_facts(self.page_results)
+        self.assertIs(
+            v1._get_baseline_facts(self.page_results)[self.baseline.id], facts[self.baseline.id]
+        )
+
+        result = self.stream_page()
+        self.assertEqual(result["data"][0]["display_name"], "baseline1")
+        self.assertEqual(result["data"][0]["mapped_system_count"], 3)
+        self.assertEqual(result["data"][0]["baseline_facts"], baseline_facts)
+
+        self.baseline.baseline_facts = [{"name": "arch", "value": "aarch64"}]
+        db.session.commit()
+
+        result = self.stream_page()
+        self.assertEqual(
+            result["data"][0]["baseline_facts"], [{"name": "arch", "value": "aarch64"}]
+        )
+
+    def test_fields_written_without_modification_time_are_not_cached(self):
+        self.stream_page()
+
+        # as the org_id populator does, without bumping modified_on
+        db.session.execute(
+            update(SystemBaseline)
+            .where(SystemBaseline.id == self.baseline.id)
+            .values(org_id="populated", modified_on=SystemBaseline.modified_on)
+        )
+        db.session.commit()
+
+        hits = metrics.baseline_cache_hits._value.get()
+        result = self.stream_page()
+        self.assertEqual(metrics.baseline_cache_hits._value.get(), hits + 1)
+        self.assertEqual(result["data"][0]["org_id"], "populated")
+        self.assertEqual(result["data"][0]["baseline_facts"], baseline_facts)
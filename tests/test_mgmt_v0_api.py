@@ -2,6 +2,11 @@ import json
 import unittest
 
 from system_baseline import app
+from system_baseline import metrics as baseline_metrics
+from system_baseline.mgmt_views import v0
+from system_baseline.models import SystemBaseline, db
+
+from .test_db_models import DbModelTest, account1, baseline_facts
 
 
 class ManagementApiTests(unittest.TestCase):
@@ -22,3 +27,23 @@ class ManagementApiTests(unittest.TestCase):
         # the response will contain stats for calls made by other unit
         # tests. Just check for a 200.
         self.assertEqual(response.status_code, 200)
+
+
+class BaselineGaugesTests(DbModelTest):
+    def test_update_baseline_counts(self):
+        self.populate_db_with_stuff()
+        # a baseline created before org IDs, counted in the total and as its own group
+        db.session.add(
+            SystemBaseline(
+                account=account1, display_name="no org_id", baseline_facts=baseline_facts
+            )
+        )
+        db.session.commit()
+
+        v0._update_baseline_counts()
+
+        self.assertEqual(baseline_metrics.baseline_count._value.get(), 5)
+        self.assertEqual(baseline_metrics.baseline_account_count._value.get(), 3)
+        self.assertEqual(baseline_metrics.baseline_account_count_ones._value.get(), 3)
+        self.assertEqual(baseline_metrics.baseline_account_count_tens._value.get(), 0)
+        self.assertEqual(baseline_metrics.baseline_account_count_hundred_plus._value.get(), 0)
@@ -0,0 +1,225 @@
+import base64
+import json
+import unittest
+import uuid
+
+from http import HTTPStatus
+
+import mock
+
+from kerlescan.exceptions import HTTPError, ItemNotReturned
+from sqlalchemy import update
+
+from system_baseline import reconciler
+from system_baseline.models import SystemBaseline, SystemBaselineMappedSystem, db
+
+from . import fixtures
+from .test_db_models import DbModelTest, account1, account2, baseline_facts, org_id1, org_id2
+
+
+class FetchMissingSystemIdsTests(unittest.TestCase):
+    @mock.patch("system_baseline.reconciler.app_config.inventory_batch_size", 4)
+    @mock.patch("system_baseline.reconciler.fetch_systems_with_profiles")
+    def test_fetch_missing_system_ids(self, mock_fetch_systems):
+        system_ids = [str(uuid.uuid4()) for _ in range(10)]
+        missing_system_ids = {system_ids[1], system_ids[7]}
+
+        def _fetch_systems(batch, auth_key, logger, counters):
+            if missing_system_ids & set(batch):
+                raise ItemNotReturned("not found!")
+            return [fixtures.a_system_with_profile(system_id) for system_id in batch]
+
+        mock_fetch_systems.side_effect = _fetch_systems
+
+        result = reconciler.fetch_missing_system_ids(system_ids, "auth_key", mock.Mock())
+
+        self.assertEqual(sorted(result), sorted(missing_system_ids))
+        # three batches, and each batch with a missing system is split twice
+        self.assertEqual(mock_fetch_systems.call_count, 3 + 2 * 4)
+
+    @mock.patch("system_baseline.reconciler.fetch_systems_with_profiles")
+    def test_fetch_missing_system_ids_empty(self, mock_fetch_systems):
+        result = reconciler.fetch_missing_system_ids([], "auth_key", mock.Mock())
+
+        self.assertEqual(result, [])
+        mock_fetch_systems.assert_not_called()
+
+
+class ReconcileDirtyBaselinesTests(DbModelTest):
+    def setUp(self):
+        super(ReconcileDirtyBaselinesTests, self).setUp()
+        # RBAC lets the reconciler read every host, unless a test says otherwise
+        rbac_patcher = mock.patch("system_baseline.reconciler.view_helpers.ensure_has_permission")
+        self.mock_ensure_has_permission = rbac_patcher.start()
+        self.addCleanup(rbac_patcher.stop)
+        self.present_system_id = uuid.uuid4()
+        self.missing_system_id = uuid.uuid4()
+        self.clean_system_id = uuid.uuid4()
+
+        self.dirty_baseline_id = uuid.uuid4()
+        self.clean_baseline_id = uuid.uuid4()
+        db.session.add_all(
+            [
+                SystemBaseline(
+                    account=account1,
+                    org_id=org_id1,
+                    id=self.dirty_baseline_id,
+                    display_name="dirty baseline",
+                    baseline_facts=baseline_facts,
+                    dirty_systems=True,
+                    mapped_systems=[
+                        SystemBaselineMappedSystem(
+                            account=account1, org_id=org_id1, system_id=self.present_system_id
+                        ),
+                        SystemBaselineMappedSystem(
+                            account=account1, org_id=org_id1, system_id=self.missing_system_id
+                        ),
+                    ],
+                ),
+                SystemBaseline(
+                    account=account1,
+                    org_id=org_id1,
+                    id=self.clean_baseline_id,
+                    display_name="clean baseline",
+                    baseline_facts=baseline_facts,
+                    dirty_systems=False,
+                    mapped_systems=[
+                        SystemBaselineMappedSystem(
+                            account=account1, org_id=org_id1, system_id=self.clean_system_id
+                        ),
+                    ],
+                ),
+            ]
+        )
+        db.session.commit()
+
+    @mock.patch("system_baseline.reconciler.fetch_systems_with_profiles")
+    def test_reconcile_dirty_baselines(self, mock_fetch_systems):
+        def _fetch_systems(batch, auth_key, logger, counters):
+            if str(self.missing_system_id) in batch:
+                raise ItemNotReturned("not found!")
+            return [fixtures.a_system_with_profile(system_id) for system_id in batch]
+
+        mock_fetch_systems.side_effect = _fetch_systems
+
+        reconciled_count = reconciler.reconcile_dirty_baselines(mock.Mock())
+
+        self.assertEqual(reconciled_count, 1)
+        fetched_system_ids = {
+            system_id for call in mock_fetch_systems.call_args_list for system_id in call[0][0]
+        }
+        self.assertNotIn(str(self.clean_system_id), fetched_system_ids)
+
+        dirty_baseline = db.session.get(SystemBaseline, self.dirty_baseline_id)
+        self.assertFalse(dirty_baseline.dirty_systems)
+        self.assertEqual(dirty_baseline.mapped_system_ids(), [str(self.present_system_id)])
+
+        clean_baseline = db.session.get(SystemBaseline, self.clean_baseline_id)
+        self.assertEqual(clean_baseline.mapped_system_ids(), [str(self.clean_system_id)])
+
+    @mock.patch("system_baseline.reconciler.fetch_systems_with_profiles")
+    def test_reconcile_keeps_flag_on_inventory_error(self, mock_fetch_systems):
+        other_baseline_id = uuid.uuid4()
+        other_system_id = uuid.uuid4()
+        db.session.add(
+            SystemBaseline(
+                account=account2,
+                org_id=org_id2,
+                id=other_baseline_id,
+                display_name="other tenant's dirty baseline",
+                baseline_facts=baseline_facts,
+                dirty_systems=True,
+                mapped_systems=[
+                    SystemBaselineMappedSystem(
+                        account=account2, org_id=org_id2, system_id=other_system_id
+                    ),
+                ],
+            )
+        )
+        db.session.commit()
+
+        def _fetch_systems(batch, auth_key, logger, counters):
+            # the first tenant read fails, the other one is still reconciled
+            if str(other_system_id) not in batch:
+                raise Exception("inventory unavailable")
+            raise ItemNotReturned("not found!")
+
+        mock_fetch_systems.side_effect = _fetch_systems
+        mock_logger = mock.Mock()
+
+        reconciled_count = reconciler.reconcile_dirty_baselines(mock_logger, batch_size=1)
+
+        self.assertEqual(reconciled_count, 1)
+        mock_logger.exception.assert_called_once()
+
+        dirty_baseline = db.session.get(SystemBaseline, self.dirty_baseline_id)
+        self.assertTrue(dirty_baseline.dirty_systems)
+        self.assertEqual(len(dirty_baseline.mapped_system_ids()), 2)
+
+        other_baseline = db.session.get(SystemBaseline, other_baseline_id)
+        self.assertFalse(other_baseline.dirty_systems)
+        self.assertEqual(other_baseline.mapped_system_ids(), [])
+
+    @mock.patch("system_baseline.reconciler.fetch_systems_with_profiles")
+    def test_does_not_remove_systems_hidden_by_rbac(self, mock_fetch_systems):
+        def _ensure_has_permission(**kwargs):
+            kwargs["rbac_filters"]["group.id"] = [{"id": "group1"}]
+
+        self.mock_ensure_has_permission.side_effect = _ensure_has_permission
+        # systems of other groups are not returned to the reconciler's identity
+        mock_fetch_systems.side_effect = ItemNotReturned("not found!")
+        mock_logger = mock.Mock()
+
+        reconciled_count = reconciler.reconcile_dirty_baselines(mock_logger)
+
+        self.assertEqual(reconciled_count, 0)
+        mock_fetch_systems.assert_not_called()
+        mock_logger.error.assert_called_once()
+        self.assertEqual(
+            self.mock_ensure_has_permission.call_args[1]["permissions"],
+            reconciler.INVENTORY_READ_PERMISSIONS,
+        )
+
+        dirty_baseline = db.session.get(SystemBaseline, self.dirty_baseline_id)
+        self.assertTrue(dirty_baseline.dirty_systems)
+        self.assertEqual(len(dirty_baseline.mapped_system_ids()), 2)
+
+    @mock.patch("system_baseline.reconciler.fetch_systems_with_profiles")
+    def test_does_not_remove_systems_when_rbac_denies(self, mock_fetch_systems):
+        self.mock_ensure_has_permission.side_effect = HTTPError(
+            HTTPStatus.FORBIDDEN, message="user does not have access"
+        )
+        mock_logger = mock.Mock()
+
+        reconciled_count = reconciler.reconcile_dirty_baselines(mock_logger)
+
+        self.assertEqual(reconciled_count, 0)
+        mock_fetch_systems.assert_not_called()
+        mock_logger.exception.assert_called_once()
+        self.assertTrue(db.session.get(SystemBaseline, self.dirty_baseline_id).dirty_systems)
+
+    def test_keeps_flag_of_baselines_modified_since_read(self):
+        (baseline,) = reconciler.read_dirty_baselines(10)
+        db.session.execute(
+            update(SystemBaseline)
+            .where(SystemBaseline.id == self.dirty_baseline_id)
+            .values(display_name="renamed")
+        )
+
+        cleared_ids = reconciler._remove_systems_and_clear_flags(
+            [baseline], [], account1, org_id1, mock.Mock()
+        )
+
+        self.assertEqual(cleared_ids, set())
+        self.assertTrue(db.session.get(SystemBaseline, self.dirty_baseline_id).dirty_systems)
+
+
+class TenantIdentityTests(unittest.TestCase):
+    def test_tenant_identity_is_not_an_org_admin_user(self):
+        identity = json.loads(base64.b64decode(reconciler._tenant_identity(account1, org_id1)))[
+            "identity"
+        ]
+
+        self.assertEqual(identity["type"], "ServiceAccount")
+        self.assertEqual(identity["org_id"], org_id1)
+        self.assertNotIn("user", identity)
@@ -0,0 +1,86 @@
+import mock
+
+from sqlalchemy import select, text, update
+from sqlalchemy.exc import DBAPIError
+
+from system_baseline import db_config, replica
+from system_baseline.models import SystemBaseline, db
+
+from .test_db_models import DbModelTest
+
+
+class ReplicaRoutingTest(DbModelTest):
+    def setUp(self):
+        super(ReplicaRoutingTest, self).setUp()
+        patcher = mock.patch("system_baseline.replica.db_config.db_replica_uri", db_config.db_uri)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _create_app(self):
+        app = super(ReplicaRoutingTest, self)._create_app()
+        # the primary stands in for the replica
+        app.config["SQLALCHEMY_BINDS"] = {replica.REPLICA_BIND_KEY: db_config.db_uri}
+        return app
+
+    @mock.patch("system_baseline.replica.replica_status")
+    def test_reads_go_to_replica(self, mock_replica_status):
+        mock_replica_status.get.return_value = True
+        replica_engine = db.engines[replica.REPLICA_BIND_KEY]
+        read = select(SystemBaseline.id)
+        write = update(SystemBaseline).values(display_name="renamed")
+
+        self.assertIs(db.session.get_bind(clause=read), db.engine)
+        with replica.replica_reads():
+            self.assertIs(db.session.get_bind(clause=read), replica_engine)
+            self.assertIs(db.session.get_bind(clause=write), db.engine)
+        self.assertIs(db.session.get_bind(clause=read), db.engine)
+
+    @mock.patch("system_baseline.replica.replica_status")
+    def test_lagging_replica_falls_back_to_primary(self, mock_replica_status):
+        mock_replica_status.get.return_value = False
+
+        with replica.replica_reads():
+            self.assertIs(db.session.get_bind(clause=select(SystemBaseline.id)), db.engine)
+
+    @mock.patch("system_baseline.replica.replica_status")
+    def test_reads_from_replica(self, mock_replica_status):
+        mock_replica_status.get.return_value = True
+
+        @replica.reads_from_replica
+        def read():
+            return db.session.get_bind(clause=select(SystemBaseline.id))
+
+        self.assertIs(read(), db.engines[replica.REPLICA_BIND_KEY])
+        self.assertFalse(replica.use_replica())
+
+    def test_primary_is_not_a_current_replica(self):
+        self.assertFalse(replica._replica_is_current())
+
+
+class ReadOnlyTransactionTest(DbModelTest):
+    def test_read_only_transaction(self):
+        with replica.replica_reads():
+            self.assertEqual(db.session.execute(text("show transaction_read_only")).scalar(), "on")
+            with self.assertRaises(DBAPIError):
+                db.session.execute(update(SystemBaseline).values(display_name="renamed"))
+        db.session.rollback()
+
+        self.assertEqual(db.session.execute(text("show transaction_read_only")).scalar(), "off")
+
+    def test_read_only_function(self):
+        @replica.reads_from_replica
+        def read():
+            return db.session.execute(text("show transaction_read_only")).scalar()
+
+        self.assertEqual(read(), "on")
+
+    def test_snapshot_function(self):
+        @replica.reads_snapshot_from_replica
+        def read():
+            return [
+                db.session.execute(text("show transaction_isolation")).scalar(),
+                db.session.execute(text("show transaction_read_only")).scalar(),
+            ]
+
+        self.assertEqual(read(), ["repeatable read", "on"])
+        self.assertFalse(replica.is_snapshot())
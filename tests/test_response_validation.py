@@ -0,0 +1,69 @@
+import asyncio
+import unittest
+
+import mock
+
+from connexion.exceptions import NonConformingResponseBody
+
+from system_baseline import metrics
+from system_baseline.response_validation import SampledJSONResponseBodyValidator
+
+
+class SampledJSONResponseBodyValidatorTests(unittest.TestCase):
+    def setUp(self):
+        self.validator = SampledJSONResponseBodyValidator(
+            {}, schema={"type": "object", "required": ["data"]}, encoding="utf-8"
+        )
+
+    @mock.patch("system_baseline.response_validation.app_config.response_validation", "full")
+    def test_full_validation_fails_response(self):
+        self.validator._validate({"data": []})
+
+        with self.assertRaises(NonConformingResponseBody):
+            self.validator._validate({})
+
+    @mock.patch("system_baseline.response_validation.app_config.response_validation", "sampled")
+    def test_sampled_validation_counts_violations(self):
+        violations = metrics.response_validation_violations._value.get()
+
+        self.validator._validate({})
+
+        self.assertEqual(metrics.response_validation_violations._value.get(), violations + 1)
+
+    @mock.patch(
+        "system_baseline.response_validation.app_config.response_validation_sample_rate", 0.01
+    )
+    @mock.patch("system_baseline.response_validation.app_config.response_validation", "sampled")
+    @mock.patch("system_baseline.response_validation.random.random")
+    def test_sampled_validation_skips_responses(self, mock_random):
+        send = mock.Mock()
+
+        mock_random.return_value = 0.5
+        self.assertIs(self.validator.wrap_send(send), send)
+
+        mock_random.return_value = 0.005
+        self.assertIsNot(self.validator.wrap_send(send), send)
+
+    @mock.patch(
+        "system_baseline.response_validation.app_config.response_validation_sample_rate", 1.0
+    )
+    @mock.patch("system_baseline.response_validation.app_config.response_validation", "sampled")
+    def test_sampled_validation_skips_streamed_responses(self):
+        violations = metrics.response_validation_violations._value.get()
+        for headers, sent_before_end in (
+            ([(b"content-type", b"application/json")], 2),
+            ([(b"content-type", b"application/json"), (b"content-length", b"2")], 0),
+        ):
+            send = mock.AsyncMock()
+            validated_send = self.validator.wrap_send(send)
+
+            asyncio.run(validated_send({"type": "http.response.start", "headers": headers}))
+            asyncio.run(
+                validated_send({"type": "http.response.body", "body": b"{}", "more_body": True})
+            )
+            self.assertEqual(send.await_count, sent_before_end)
+            asyncio.run(validated_send({"type": "http.response.body", "body": b""}))
+            self.assertEqual(send.await_count, 3)
+
+        # only the response with a Content-Length was validated
+        self.assertEqual(metrics.response_validation_violations._value.get(), violations + 1)
@@ -1,3 +1,4 @@
+import base64
 import datetime
 import json
 import unittest
@@ -11,8 +12,11 @@ from kerlescan.exceptions import ItemNotReturned
 from mock import patch
 
 from system_baseline import app
+from system_baseline.models import SystemBaseline, db
+from system_baseline.views import v1
 
 from . import fixtures
+from .test_db_models import DbModelTest, baseline_facts
 
 
 class ApiTest(unittest.TestCase):
@@ -28,10 +32,37 @@ class ApiTest(unittest.TestCase):
         self.rbac_patcher.stop()
 
 
+class ApiDbTest(ApiTest, DbModelTest):
+    """
+    API tests of baselines added to the database directly, since they can no longer
+    be created through the API
+    """
+
+    def setUp(self):
+        DbModelTest.setUp(self)
+        ApiTest.setUp(self)
+
+    def tearDown(self):
+        DbModelTest.tearDown(self)
+
+    def add_baseline(self, display_name, **kwargs):
+        """
+        add a baseline of the AUTH_HEADER identity
+        """
+        baseline = SystemBaseline(
+            account=fixtures.AUTH_ACCOUNT_NUMBER,
+            org_id=fixtures.AUTH_ORG_ID,
+            display_name=display_name,
+            baseline_facts=baseline_facts,
+            **kwargs,
+        )
+        db.session.add(baseline)
+        db.session.commit()
+        return baseline
+
+
 class EmptyApiTests(ApiTest):
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_fetch_empty_baseline_list(self, mock_fetch_systems):
-        mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
+    def test_fetch_empty_baseline_list(self):
         with self.client() as client:
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
         self.assertEqual(response.status_code, 200)
@@ -111,11 +142,9 @@ class ApiSortTests(ApiTest):
                 json=fixtures.BASELINE_UNSORTED_LOAD,
             )
 
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def tearDown(self, mock_fetch_systems):
+    def tearDown(self):
         with self.client() as client:
             super(ApiSortTests, self).tearDown()
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             data = json.loads(response.content)["data"]
             for baseline in data:
@@ -126,10 +155,8 @@ class ApiSortTests(ApiTest):
                 self.assertEqual(response.status_code, 200)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_fetch_sorted_baseline_facts(self, mock_fetch_systems):
+    def test_fetch_sorted_baseline_facts(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -186,10 +213,8 @@ class ApiGeneralTests(ApiTest):
                 self.assertEqual(response.status_code, 200)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_value_values(self, mock_fetch_systems):
+    def test_value_values(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.post(
                 "api/system-baseline/v1/baselines",
                 headers=fixtures.AUTH_HEADER,
@@ -202,10 +227,8 @@ class ApiGeneralTests(ApiTest):
             )
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_fetch_baseline_list(self, mock_fetch_systems):
+    def test_fetch_baseline_list(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -213,10 +236,8 @@ class ApiGeneralTests(ApiTest):
             self.assertEqual(result["meta"]["total_available"], 2)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_fetch_baselines_missing_uuid(self, mock_fetch_systems):
+    def test_fetch_baselines_missing_uuid(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -231,10 +252,8 @@ class ApiGeneralTests(ApiTest):
             message = json.loads(response.content)["message"]
             self.assertEqual(f"ids [{missing_id}] not available to display", message)
 
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_fetch_baseline_list_sort_display_name(self, mock_fetch_systems):
+    def test_fetch_baseline_list_sort_display_name(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get(
                 "api/system-baseline/v1/baselines?order_by=display_name",
                 headers=fixtures.AUTH_HEADER,
@@ -251,10 +270,8 @@ class ApiGeneralTests(ApiTest):
             self.assertEqual(desc_result["data"][::-1], asc_result["data"])
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_create_deletion_request(self, mock_fetch_systems):
+    def test_create_deletion_request(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -267,11 +284,9 @@ class ApiGeneralTests(ApiTest):
             self.assertEqual(response.status_code, 200)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_fetch_baseline_list_sort_updated(self, mock_fetch_systems):
+    def test_fetch_baseline_list_sort_updated(self):
         with self.client() as client:
             # modify one baseline
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             uuid_to_modify = json.loads(response.content)["data"][0]["id"]
@@ -300,10 +315,8 @@ class ApiGeneralTests(ApiTest):
             self.assertEqual(desc_result["data"][::-1], asc_result["data"])
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_fetch_duplicate_uuid(self, mock_fetch_systems):
+    def test_fetch_duplicate_uuid(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get(
                 "api/system-baseline/v1/baselines?display_name=arch",
                 headers=fixtures.AUTH_HEADER,
@@ -318,10 +331,8 @@ class ApiGeneralTests(ApiTest):
             self.assertEqual(response.status_code, 400)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_fetch_baseline_search(self, mock_fetch_systems):
+    def test_fetch_baseline_search(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get(
                 "api/system-baseline/v1/baselines?display_name=arch",
                 headers=fixtures.AUTH_HEADER,
@@ -540,10 +551,8 @@ class CopyBaselineTests(ApiTest):
                 self.assertEqual(response.status_code, 200)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_copy_baseline(self, mock_fetch_systems):
+    def test_copy_baseline(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -587,6 +596,77 @@ class CopyBaselineTests(ApiTest):
             self.assertNotEqual(old_date, new_date)
 
 
+class ApiETagTests(ApiDbTest):
+    def setUp(self):
+        super(ApiETagTests, self).setUp()
+        self.baseline = self.add_baseline("etag baseline 1")
+        self.add_baseline("etag baseline 2")
+        self.baseline_url = "api/system-baseline/v1/baselines/%s" % self.baseline.id
+
+    def test_baseline_list_not_modified(self):
+        with self.client() as client:
+            response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(json.loads(response.content)["data"]), 2)
+            etag = response.headers["ETag"]
+            self.assertTrue(etag.startswith("W/"))
+
+            response = client.get(
+                "api/system-baseline/v1/baselines",
+                headers={**fixtures.AUTH_HEADER, "If-None-Match": etag},
+            )
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.headers["ETag"], etag)
+
+            # another page is another representation
+            response = client.get(
+                "api/system-baseline/v1/baselines?limit=1",
+                headers={**fixtures.AUTH_HEADER, "If-None-Match": etag},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(json.loads(response.content)["data"]), 1)
+            self.assertNotEqual(response.headers["ETag"], etag)
+
+            self.baseline.display_name = "renamed etag baseline"
+            db.session.commit()
+
+            response = client.get(
+                "api/system-baseline/v1/baselines",
+                headers={**fixtures.AUTH_HEADER, "If-None-Match": etag},
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_baselines_by_ids_not_modified(self):
+        with self.client() as client:
+            response = client.get(self.baseline_url, headers=fixtures.AUTH_HEADER)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                json.loads(response.content)["data"][0]["display_name"], "etag baseline 1"
+            )
+            etag = response.headers["ETag"]
+            self.assertFalse(etag.startswith("W/"))
+
+            response = client.get(
+                self.baseline_url, headers={**fixtures.AUTH_HEADER, "If-None-Match": etag}
+            )
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response.headers["ETag"], etag)
+            self.assertEqual(response.content, b"")
+
+            self.baseline.display_name = "renamed etag baseline"
+            db.session.commit()
+
+            response = client.get(
+                self.baseline_url, headers={**fixtures.AUTH_HEADER, "If-None-Match": etag}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response.headers["ETag"], etag)
+            self.assertEqual(
+                json.loads(response.content)["data"][0]["display_name"], "renamed etag baseline"
+            )
+
+
 class ApiPatchTests(ApiTest):
     def setUp(self):
         super(ApiPatchTests, self).setUp()
@@ -610,11 +690,9 @@ class ApiPatchTests(ApiTest):
                 self.assertEqual(response.status_code, 200)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_patch_baseline(self, mock_fetch_systems):
+    def test_patch_baseline(self):
         with self.client() as client:
             # obtain the UUID for a baseline
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -877,10 +955,8 @@ class ApiPaginationTests(ApiTest):
                 )
                 self.assertEqual(response.status_code, 200)
 
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_links_with_additional_query_param(self, mock_fetch_systems):
+    def test_links_with_additional_query_param(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get(
                 "api/system-baseline/v1/baselines",
                 params={"display_name": self.display_name},
@@ -895,10 +971,120 @@ class ApiPaginationTests(ApiTest):
                 self.assertIn("display_name", query_params)
                 self.assertEqual(query_params["display_name"][0], self.display_name)
 
+    def test_display_name_prefix_search(self):
+        with self.client() as client:
+            response = client.get(
+                "api/system-baseline/v1/baselines",
+                params={"display_name": "baseline", "display_name_match": "prefix"},
+                headers=fixtures.AUTH_HEADER,
+            )
+            self.assertEqual(response.status_code, 200)
+            links = json.loads(response.content)["links"]
+            query_params = parse_qs(urlsplit(links["first"])[3])
+            self.assertEqual(query_params["display_name_match"][0], "prefix")
+
+            response = client.get(
+                "api/system-baseline/v1/baselines",
+                params={"display_name": "baseline", "display_name_match": "suffix"},
+                headers=fixtures.AUTH_HEADER,
+            )
+            self.assertEqual(response.status_code, 400)
+
+    def test_invalid_cursor(self):
+        with self.client() as client:
+            for cursor in ("not a cursor", base64.urlsafe_b64encode(b'["updated"]').decode()):
+                response = client.get(
+                    "api/system-baseline/v1/baselines",
+                    params={"cursor": cursor},
+                    headers=fixtures.AUTH_HEADER,
+                )
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("invalid cursor", response.content.decode("utf-8"))
+
+    def test_cursor_for_another_ordering(self):
+        with self.client() as client:
+            cursor = base64.urlsafe_b64encode(
+                json.dumps(["updated", "ASC", "2024-01-01T00:00:00", str(uuid.uuid4())]).encode()
+            ).decode()
+            response = client.get(
+                "api/system-baseline/v1/baselines",
+                params={"cursor": cursor, "order_by": "display_name"},
+                headers=fixtures.AUTH_HEADER,
+            )
+            self.assertEqual(response.status_code, 400)
+
+
+class ApiCursorPaginationTests(ApiDbTest):
+    def _walk_pages(self, client, order_by, order_how):
+        """
+        return the baselines of every page, one per page, starting from the first
+        page and following the cursors
+        """
+        params = {"limit": 1, "order_by": order_by, "order_how": order_how}
+        response = client.get(
+            "api/system-baseline/v1/baselines", params=params, headers=fixtures.AUTH_HEADER
+        )
+        self.assertEqual(response.status_code, 200)
+        result = json.loads(response.content)
+        baselines = result["data"]
+
+        response = client.get(
+            "api/system-baseline/v1/baselines",
+            params={**params, "cursor": result["links"]["next_cursor"]},
+            headers=fixtures.AUTH_HEADER,
+        )
+        while True:
+            self.assertEqual(response.status_code, 200)
+            result = json.loads(response.content)
+            self.assertEqual(len(result["data"]), 1)
+            baselines += result["data"]
+            # the offset links would point at the second page
+            self.assertNotIn("previous", result["links"])
+            self.assertNotIn("last", result["links"])
+            if result["links"]["next"] is None:
+                break
+            next_link = urlsplit(result["links"]["next"])
+            response = client.get(
+                "%s?%s" % (next_link.path.lstrip("/"), next_link.query),
+                headers=fixtures.AUTH_HEADER,
+            )
+
+        self.assertNotIn("next_cursor", result["links"])
+        return baselines
+
+    def test_walk_pages_with_cursor(self):
+        for display_name in ("baseline c", "baseline a", "baseline b"):
+            self.add_baseline(display_name)
+
+        with self.client() as client:
+            baselines = self._walk_pages(client, "display_name", "ASC")
+
+        self.assertEqual(
+            [baseline["display_name"] for baseline in baselines],
+            ["baseline a", "baseline b", "baseline c"],
+        )
+
+    def test_walk_pages_with_tied_values(self):
+        # baselines copied by the same statement share their timestamps, the cursor
+        # then resumes from the id
+        now = datetime.datetime(2024, 1, 1, 12, 0, 0, 123456)
+        baseline_ids = sorted(
+            str(self.add_baseline("baseline %d" % i, created_on=now, modified_on=now).id)
+            for i in range(4)
+        )
+
+        with self.client() as client:
+            for order_by in ("created_on", "updated"):
+                for order_how, expected_ids in (
+                    ("ASC", baseline_ids),
+                    ("DESC", baseline_ids[::-1]),
+                ):
+                    baselines = self._walk_pages(client, order_by, order_how)
+                    self.assertEqual([baseline["id"] for baseline in baselines], expected_ids)
+
 
 class ApiSystemsAssociationTests(ApiTest):
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def setUp(self, mock_fetch_systems):
+    def setUp(self):
         super(ApiSystemsAssociationTests, self).setUp()
 
         self.system_ids = [
@@ -909,32 +1095,6 @@ class ApiSystemsAssociationTests(ApiTest):
             str(uuid.uuid4()),
         ]
 
-        self.system_groupings = [
-            [
-                {"id": "d6bba69a-25a8-11e9-81b8-c85b761454fa", "name": "first group"},
-            ],
-            [
-                {"id": "11b3cbce-25a9-11e9-8457-c85b761454fa", "name": "second group"},
-            ],
-            [
-                {"id": "d6bba69a-25a8-11e9-81b8-c85b761454fa", "name": "first group"},
-            ],
-            [
-                {"id": "d6bba69a-25a8-11e9-81b8-c85b761454fa", "name": "first group"},
-                {"id": "11b3cbce-25a9-11e9-8457-c85b761454fa", "name": "second group"},
-            ],
-            [],
-        ]
-
-        mock_fetch_systems.return_value = [
-            {
-                **fixtures.SYSTEM_WITH_PROFILE,
-                "id": system_id,
-                "groups": self.system_groupings[index],
-            }
-            for index, system_id in enumerate(self.system_ids)
-        ]
-
         with self.client() as client:
             response = client.post(
                 "api/system-baseline/v1/baselines",
@@ -955,13 +1115,11 @@ class ApiSystemsAssociationTests(ApiTest):
             )
             self.assertEqual(response.status_code, 200)
 
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def tearDown(self, mock_fetch_systems):
+    def tearDown(self):
         super(ApiSystemsAssociationTests, self).tearDown()
 
         with self.client() as client:
             # get all baselines
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             baselines = json.loads(response.content)["data"]
 
@@ -1152,8 +1310,7 @@ class ApiSystemsAssociationTests(ApiTest):
             self.assertEqual(len(response_system_ids), 5)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_adding_few_systems(self, mock_fetch_systems):
+    def test_adding_few_systems(self):
         # to create
         system_ids = [
             str(uuid.uuid4()),
@@ -1161,9 +1318,6 @@ class ApiSystemsAssociationTests(ApiTest):
         ]
 
         with self.client() as client:
-            mock_fetch_systems.return_value = [
-                fixtures.a_system_with_profile(system_id) for system_id in system_ids
-            ]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -1183,20 +1337,16 @@ class ApiSystemsAssociationTests(ApiTest):
                 self.assertIn(system_id, response_system_ids)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_get_system_count_for_baselines(self, mock_fetch_systems):
+    def test_get_system_count_for_baselines(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
             self.assertEqual(result["data"][0]["mapped_system_count"], 5)
 
     @unittest.skip("drift is being shut down")
-    @mock.patch("system_baseline.views.v1.fetch_systems_with_profiles")
-    def test_get_system_count_for_baselines_by_ids(self, mock_fetch_systems):
+    def test_get_system_count_for_baselines_by_ids(self):
         with self.client() as client:
-            mock_fetch_systems.return_value = [fixtures.SYSTEM_WITH_PROFILE]
             response = client.get("api/system-baseline/v1/baselines", headers=fixtures.AUTH_HEADER)
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
@@ -1209,3 +1359,73 @@ class ApiSystemsAssociationTests(ApiTest):
             self.assertEqual(response.status_code, 200)
             result = json.loads(response.content)
             self.assertEqual(result["data"][0]["mapped_system_count"], 5)
+
+
+class GroupBaselinesTests(unittest.TestCase):
+    def test_group_baselines(self):
+        facts = [
+            {"name": "cpu.sockets", "value": "2"},
+            {"name": "arch", "value": "x86_64"},
+            {"name": "Cpu_count", "value": "4"},
+            {"name": "cpu.cores", "value": "8"},
+            {"name": "bios.vendor", "value": "acme"},
+        ]
+
+        self.assertEqual(
+            v1.group_baselines(facts),
+            [
+                {
+                    "name": "cpu",
+                    "values": [{"name": "sockets", "value": "2"}, {"name": "cores", "value": "8"}],
+                },
+                {"name": "bios", "values": [{"name": "vendor", "value": "acme"}]},
+                {"name": "arch", "value": "x86_64"},
+                {"name": "Cpu_count", "value": "4"},
+            ],
+        )
+        self.assertEqual(
+            v1.group_baselines(facts, sort=True),
+            [
+                {"name": "arch", "value": "x86_64"},
+                {"name": "bios", "values": [{"name": "vendor", "value": "acme"}]},
+                {
+                    "name": "cpu",
+                    "values": [{"name": "cores", "value": "8"}, {"name": "sockets", "value": "2"}],
+                },
+                {"name": "Cpu_count", "value": "4"},
+            ],
+        )
+        # the given facts are left as they were
+        self.assertEqual(facts[0], {"name": "cpu.sockets", "value": "2"})
+
+
+class StreamBaselinesPageTests(unittest.TestCase):
+    def test_stream_baselines_page(self):
+        page_results = [
+            mock.Mock(
+                SystemBaseline=mock.Mock(id="1", **{"to_json.return_value": {"id": "1"}}),
+                mapped_system_count=2,
+            ),
+            mock.Mock(
+                SystemBaseline=mock.Mock(id="2", **{"to_json.return_value": {"id": "2"}}),
+                mapped_system_count=0,
+            ),
+        ]
+        facts = {"1": '[{"name": "arch", "value": "x86_64"}]', "2": "null"}
+        page = {"meta": {"count": 2, "total_available": 5}, "links": {"first": "/baselines"}}
+
+        result = json.loads("".join(v1._stream_baselines_page(page, page_results, facts)))
+
+        self.assertEqual(result["meta"], page["meta"])
+        self.assertEqual(result["links"], page["links"])
+        self.assertEqual(
+            result["data"],
+            [
+                {
+                    "id": "1",
+                    "mapped_system_count": 2,
+                    "baseline_facts": [{"name": "arch", "value": "x86_64"}],
+                },
+                {"id": "2", "mapped_system_count": 0, "baseline_facts": None},
+            ],
+        )
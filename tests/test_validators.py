@@ -0,0 +1,130 @@
+import json
+import timeit
+import unittest
+
+from system_baseline import validators
+from system_baseline.exceptions import FactValidationError
+
+
+class ValidateFactsTests(unittest.TestCase):
+    def test_valid_facts(self):
+        facts = [
+            {"name": "arch", "value": "x86_64"},
+            {"name": "memory", "values": [{"name": "arch", "value": "16GB"}]},
+        ]
+
+        self.assertEqual(validators.find_fact_violations(facts), [])
+        validators.validate_facts(facts)
+
+    def test_violations_have_json_paths(self):
+        facts = [
+            {"name": "arch", "value": "x86_64"},
+            {"name": "arch", "value": "ppc64le"},
+            {
+                "name": "cpu",
+                "values": [
+                    {"name": "", "value": "2"},
+                    {"name": "sockets", "value": " 4"},
+                    {"name": "flags", "value": "a" * 1001},
+                ],
+            },
+            {"name": "cpu", "values": []},
+            {"name": "kernel", "value": "5.14", "values": []},
+        ]
+
+        self.assertEqual(
+            validators.find_fact_violations(facts),
+            [
+                ("/1", "A fact with this name already exists."),
+                ("/2/values/0", "fact name cannot be empty"),
+                (
+                    "/2/values/1",
+                    "Value for sockets cannot have leading or trailing whitespace.",
+                ),
+                ("/2/values/2", "value %s is over 1000 characters" % ("a" * 1001)),
+                ("/3", "A category with this name already exists."),
+                ("/4", "fact kernel cannot have value and values defined"),
+            ],
+        )
+
+        with self.assertRaises(FactValidationError) as context:
+            validators.validate_facts(facts)
+        self.assertEqual(len(context.exception.violations), 6)
+        self.assertIn("fact name cannot be empty (at /2/values/0)", context.exception.message)
+
+    def test_check_for_duplicate_names_ignores_other_checks(self):
+        validators.check_for_duplicate_names([{"name": " arch", "value": ""}])
+
+        with self.assertRaises(FactValidationError) as context:
+            validators.check_for_duplicate_names(
+                [{"name": "arch", "value": "a"}, {"name": "arch", "value": "b"}]
+            )
+        self.assertEqual(context.exception.message, "A fact with this name already exists.")
+
+    def test_many_facts(self):
+        facts = [{"name": "fact_%s" % index, "value": "value"} for index in range(20000)]
+        facts.append({"name": "fact_0", "value": "value"})
+
+        self.assertEqual(
+            validators.find_fact_violations(facts),
+            [("/20000", "A fact with this name already exists.")],
+        )
+
+
+class CheckFactsLengthTests(unittest.TestCase):
+    def test_facts_size_is_encoded_json_bytes(self):
+        facts = [{"name": "arch", "value": "x86_64"}]
+        size = len(json.dumps(facts).encode("utf-8"))
+
+        self.assertFalse(validators.facts_size_exceeds(facts, size))
+        self.assertTrue(validators.facts_size_exceeds(facts, size - 1))
+
+    def test_facts_size_counts_multibyte_characters(self):
+        facts = [{"name": "name", "value": "é" * 10}]
+        size = len(json.dumps(facts, ensure_ascii=False).encode("utf-8"))
+
+        self.assertFalse(validators.facts_size_exceeds(facts, size))
+        self.assertTrue(validators.facts_size_exceeds(facts, size - 1))
+
+    def test_facts_size_counts_characters_near_limit(self):
+        # both encode to 4 characters of JSON, "aa" to 4 bytes and "éé" to 6 bytes
+        self.assertFalse(validators.facts_size_exceeds("aa", 15))
+        self.assertTrue(validators.facts_size_exceeds("éé", 5))
+        self.assertFalse(validators.facts_size_exceeds("éé", 6))
+
+    def test_facts_size_is_faster_than_chunked_encoding(self):
+        facts = [
+            {
+                "name": "category_%s" % category,
+                "values": [{"name": "fact_%s" % fact, "value": "value"} for fact in range(20)],
+            }
+            for category in range(200)
+        ]
+
+        def chunked_size_exceeds(facts, limit):
+            size = 0
+            for chunk in json.JSONEncoder(ensure_ascii=False).iterencode(facts):
+                size += len(chunk.encode("utf-8"))
+                if size > limit:
+                    return True
+            return False
+
+        def best_time(function):
+            return min(timeit.repeat(lambda: function(facts, validators.FACTS_MAXSIZE), number=5))
+
+        self.assertLess(
+            best_time(validators.facts_size_exceeds), best_time(chunked_size_exceeds) / 2
+        )
+
+    def test_check_facts_length(self):
+        value = "a" * 1000
+        facts = [{"name": "fact_%s" % index, "value": value} for index in range(500)]
+        validators.check_facts_length(facts)
+
+        facts = [{"name": "fact_%s" % index, "value": value} for index in range(2000)]
+        with self.assertRaises(FactValidationError) as context:
+            validators.check_facts_length(facts)
+        self.assertEqual(
+            context.exception.message,
+            "attempted to save fact list over %s bytes" % validators.FACTS_MAXSIZE,
+        )
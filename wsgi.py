@@ -1,7 +1,9 @@
-from system_baseline.app import create_app
+import uvicorn
 
+from system_baseline.app import create_asgi_app
 
-application = create_app()
+
+application = create_asgi_app()
 
 if __name__ == "__main__":
-    application.run()
+    uvicorn.run(application)